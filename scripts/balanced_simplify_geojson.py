@@ -4,11 +4,14 @@ Balanced GeoJSON simplification that maintains coverage while reducing file size
 Target: ~10-20MB total (vs original 233MB) with proper coverage.
 """
 
+import argparse
 import json
 import os
 from pathlib import Path
 import math
 
+from visvalingam_whyatt import visvalingam_whyatt
+
 
 def douglas_peucker(points, tolerance):
     """Douglas-Peucker line simplification algorithm."""
@@ -62,17 +65,28 @@ def point_to_line_distance(point, line_start, line_end):
     return numerator / denominator
 
 
-def balanced_simplify_coordinates(coordinates, tolerance=0.005):
+# Line simplification engines selectable by name
+SIMPLIFIERS = {
+    "douglas_peucker": douglas_peucker,
+    "visvalingam_whyatt": visvalingam_whyatt,
+}
+
+
+def balanced_simplify_coordinates(coordinates, tolerance=0.005, algorithm="douglas_peucker"):
     """Balanced coordinate simplification that preserves coverage."""
     if len(coordinates) <= 4:
         return coordinates
     
-    # Apply Douglas-Peucker algorithm with moderate tolerance
-    simplified = douglas_peucker(coordinates, tolerance)
-    
     # Ensure we have enough points for proper coverage
     min_points = max(8, len(coordinates) // 50)  # At least 8 points, or 1/50th of original
     
+    if algorithm == "visvalingam_whyatt":
+        # Visvalingam-Whyatt stops at min_points, so no uniform sampling is needed
+        simplified = visvalingam_whyatt(coordinates, tolerance, min_points)
+    else:
+        # Apply the selected engine (Douglas-Peucker by default) with moderate tolerance
+        simplified = SIMPLIFIERS[algorithm](coordinates, tolerance)
+    
     if len(simplified) < min_points:
         # If too few points, use uniform sampling instead
         step = max(1, len(coordinates) // min_points)
@@ -100,12 +114,12 @@ def round_coordinates(coordinates, precision=4):
         return [round(coord, precision) for coord in coordinates]
 
 
-def balanced_simplify_geometry(geometry, tolerance=0.005, coordinate_precision=4):
+def balanced_simplify_geometry(geometry, tolerance=0.005, coordinate_precision=4, algorithm="douglas_peucker"):
     """Balanced simplification of a GeoJSON geometry."""
     if geometry["type"] == "Polygon":
         simplified_coords = []
         for ring in geometry["coordinates"]:
-            simplified_ring = balanced_simplify_coordinates(ring, tolerance)
+            simplified_ring = balanced_simplify_coordinates(ring, tolerance, algorithm)
             simplified_ring = round_coordinates(simplified_ring, coordinate_precision)
             # Keep all rings that have sufficient points
             if len(simplified_ring) >= 4:
@@ -133,7 +147,7 @@ def balanced_simplify_geometry(geometry, tolerance=0.005, coordinate_precision=4
         for polygon in geometry["coordinates"]:
             simplified_polygon = []
             for ring in polygon:
-                simplified_ring = balanced_simplify_coordinates(ring, tolerance)
+                simplified_ring = balanced_simplify_coordinates(ring, tolerance, algorithm)
                 simplified_ring = round_coordinates(simplified_ring, coordinate_precision)
                 if len(simplified_ring) >= 4:
                     simplified_polygon.append(simplified_ring)
@@ -164,7 +178,8 @@ def balanced_simplify_geometry(geometry, tolerance=0.005, coordinate_precision=4
     return geometry
 
 
-def balanced_simplify_geojson_file(input_path, output_path, tolerance=0.005, coordinate_precision=4):
+def balanced_simplify_geojson_file(input_path, output_path, tolerance=0.005, coordinate_precision=4,
+                                   algorithm="douglas_peucker"):
     """Balanced simplification of a GeoJSON file."""
     try:
         with open(input_path, 'r') as f:
@@ -178,7 +193,8 @@ def balanced_simplify_geojson_file(input_path, output_path, tolerance=0.005, coo
                 feature["geometry"] = balanced_simplify_geometry(
                     feature["geometry"], 
                     tolerance, 
-                    coordinate_precision
+                    coordinate_precision,
+                    algorithm
                 )
         
         # Write balanced version with minimal whitespace
@@ -198,6 +214,11 @@ def balanced_simplify_geojson_file(input_path, output_path, tolerance=0.005, coo
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Balanced GeoJSON simplification.")
+    parser.add_argument("--algorithm", choices=sorted(SIMPLIFIERS), default="douglas_peucker",
+                        help="Line simplification engine (default: douglas_peucker)")
+    args = parser.parse_args()
+    
     input_dir = "../data/geojson/original"
     output_dir = "../data/geojson/balanced"
     
@@ -223,7 +244,8 @@ def main():
             str(input_file), 
             str(output_file),
             tolerance=0.002,  # Less aggressive - ~200m tolerance
-            coordinate_precision=4  # 4 decimal places (~11m precision)
+            coordinate_precision=4,  # 4 decimal places (~11m precision)
+            algorithm=args.algorithm
         )
         
         if success:
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Quality-versus-size benchmark for the simplification profiles.
+
+Each variant directory (balanced/, simplified/, ultra/, ...) is compared
+against original/ zone by zone:
+- symmetric area difference, measured exactly along jittered horizontal
+  scanlines from their boundary crossings, with its standard error
+- vertex Hausdorff distance between the zone boundaries: the largest distance
+  from a vertex of either boundary to the other boundary, using a uniform grid
+  of boundary segments so nearest-segment queries only look at nearby cells.
+  Points between vertices are not measured, so it can understate the true
+  Hausdorff distance
+- dropped polygons: original polygons with no counterpart in the variant
+- file size, gzip size and JSON parse time
+
+Per variant, the misclassification rate is the share of random points inside
+some original zone that a first-match scan over the variant (as in
+ZipLookup.findZoneForPoint) assigns to a different zone.
+
+Distances and areas use a per-zone equirectangular projection in kilometres.
+"""
+
+import argparse
+import gzip
+import json
+import heapq
+import math
+import random
+import time
+from collections import defaultdict
+from pathlib import Path
+
+
+KM_PER_DEGREE = 111.32
+
+# Zone order used by the frontend lookup
+ZONE_ORDER = ['3a', '3b', '4a', '4b', '5a', '5b', '6a', '6b', '7a', '7b', '8a', '8b',
+              '9a', '9b', '10a', '10b', '11a', '11b', '12a']
+
+
+def load_polygons(path):
+    """Load all polygons of a zone file as lists of rings."""
+    with open(path, 'r') as f:
+        geojson = json.load(f)
+
+    polygons = []
+    for feature in geojson["features"]:
+        geometry = feature.get("geometry")
+        if not geometry:
+            continue
+        if geometry["type"] == "Polygon":
+            polygons.append(geometry["coordinates"])
+        elif geometry["type"] == "MultiPolygon":
+            polygons.extend(geometry["coordinates"])
+    return polygons
+
+
+def project_polygons(polygons, lat0):
+    """Project [lon, lat] polygons to (x, y) kilometres around latitude lat0."""
+    scale_x = KM_PER_DEGREE * math.cos(math.radians(lat0))
+    return [[[(lon * scale_x, lat * KM_PER_DEGREE) for lon, lat, *_ in ring] for ring in polygon]
+            for polygon in polygons]
+
+
+def polygons_bbox(polygons):
+    """Bounding box (min_x, min_y, max_x, max_y) of a list of polygons."""
+    xs = [point[0] for polygon in polygons for ring in polygon for point in ring]
+    ys = [point[1] for polygon in polygons for ring in polygon for point in ring]
+    if not xs:
+        return None
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def ring_area(ring):
+    """Unsigned shoelace area of a ring."""
+    area = 0.0
+    for i in range(len(ring) - 1):
+        x1, y1 = ring[i]
+        x2, y2 = ring[i + 1]
+        area += x1 * y2 - x2 * y1
+    return abs(area) / 2
+
+
+def polygon_area(polygon):
+    """Area of a polygon: outer ring minus holes."""
+    if not polygon:
+        return 0.0
+    return ring_area(polygon[0]) - sum(ring_area(ring) for ring in polygon[1:])
+
+
+def point_segment_distance(px, py, x1, y1, x2, y2):
+    """Distance from a point to a segment."""
+    dx = x2 - x1
+    dy = y2 - y1
+    if dx == 0 and dy == 0:
+        return math.hypot(px - x1, py - y1)
+    t = ((px - x1) * dx + (py - y1) * dy) / (dx * dx + dy * dy)
+    t = max(0.0, min(1.0, t))
+    return math.hypot(px - (x1 + t * dx), py - (y1 + t * dy))
+
+
+class GeometryIndex:
+    """Point-in-geometry and distance-to-boundary queries over a set of polygons.
+
+    Containment uses horizontal bands holding the edges that cross them, so a
+    ray cast only tests edges in the point's band. Boundary distance uses a
+    uniform grid of segments searched in growing rings of cells.
+    """
+
+    def __init__(self, polygons):
+        self.edges = [(ring[i][0], ring[i][1], ring[i + 1][0], ring[i + 1][1])
+                      for polygon in polygons for ring in polygon for i in range(len(ring) - 1)]
+        self.bbox = polygons_bbox(polygons)
+        if not self.edges or self.bbox is None:
+            self.bbox = None
+            return
+
+        min_x, min_y, max_x, max_y = self.bbox
+        width = max(max_x - min_x, 1e-9)
+        height = max(max_y - min_y, 1e-9)
+
+        # Horizontal bands for containment
+        self.band_count = max(1, int(math.sqrt(len(self.edges))))
+        self.band_height = height / self.band_count
+        self.bands = defaultdict(list)
+        for edge in self.edges:
+            _, y1, _, y2 = edge
+            if y1 == y2:
+                continue
+            first = self._band(min(y1, y2))
+            last = self._band(max(y1, y2))
+            for band in range(first, last + 1):
+                self.bands[band].append(edge)
+
+        # Uniform segment grid for distance queries, with cells about two edges wide
+        mean_edge = sum(math.hypot(x2 - x1, y2 - y1) for x1, y1, x2, y2 in self.edges) / len(self.edges)
+        self.cell_size = max(mean_edge * 2, math.sqrt(width * height) / 4096, 1e-9)
+        self.cols = int(width / self.cell_size) + 1
+        self.rows = int(height / self.cell_size) + 1
+        self.cells = defaultdict(list)
+        for edge in self.edges:
+            x1, y1, x2, y2 = edge
+            c1, r1 = self._cell(min(x1, x2), min(y1, y2))
+            c2, r2 = self._cell(max(x1, x2), max(y1, y2))
+            for col in range(c1, c2 + 1):
+                for row in range(r1, r2 + 1):
+                    self.cells[(col, row)].append(edge)
+
+    def _band(self, y):
+        return min(self.band_count - 1, max(0, int((y - self.bbox[1]) / self.band_height)))
+
+    def _cell(self, x, y):
+        col = min(self.cols - 1, max(0, int((x - self.bbox[0]) / self.cell_size)))
+        row = min(self.rows - 1, max(0, int((y - self.bbox[1]) / self.cell_size)))
+        return col, row
+
+    def crossings(self, y):
+        """Sorted x positions where the horizontal line at y crosses the boundary."""
+        if self.bbox is None or y < self.bbox[1] or y > self.bbox[3]:
+            return []
+        return sorted((x2 - x1) * (y - y1) / (y2 - y1) + x1
+                      for x1, y1, x2, y2 in self.bands.get(self._band(y), ())
+                      if (y1 > y) != (y2 > y))
+
+    def contains(self, x, y):
+        """Even-odd point-in-geometry test."""
+        if self.bbox is None:
+            return False
+        min_x, min_y, max_x, max_y = self.bbox
+        if x < min_x or x > max_x or y < min_y or y > max_y:
+            return False
+
+        inside = False
+        for x1, y1, x2, y2 in self.bands.get(self._band(y), ()):
+            if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+                inside = not inside
+        return inside
+
+    def distance_to_boundary(self, x, y, stop_below=0.0, max_distance=math.inf):
+        """Distance from a point to the nearest boundary segment.
+
+        The search stops early once a segment closer than stop_below is found,
+        which is all a Hausdorff maximum needs, or once every remaining segment
+        is known to be farther than max_distance.
+        """
+        if self.bbox is None:
+            return math.inf
+
+        col, row = self._cell(x, y)
+        min_x, min_y = self.bbox[0], self.bbox[1]
+
+        best = math.inf
+        radius = 0
+        while True:
+            # Once a ring would visit more cells than there are edges, scan them all
+            if (2 * radius + 1) ** 2 > len(self.edges):
+                for x1, y1, x2, y2 in self.edges:
+                    d = point_segment_distance(x, y, x1, y1, x2, y2)
+                    if d < best:
+                        best = d
+                return best
+
+            for c in range(col - radius, col + radius + 1):
+                for r in range(row - radius, row + radius + 1):
+                    if max(abs(c - col), abs(r - row)) != radius:
+                        continue
+                    for x1, y1, x2, y2 in self.cells.get((c, r), ()):
+                        d = point_segment_distance(x, y, x1, y1, x2, y2)
+                        if d < best:
+                            best = d
+
+            if best < stop_below:
+                break
+
+            # Covered the whole grid
+            if col - radius <= 0 and row - radius <= 0 and col + radius >= self.cols - 1 and row + radius >= self.rows - 1:
+                break
+
+            # Unvisited cells lie outside the visited square of cells
+            left = min_x + (col - radius) * self.cell_size
+            bottom = min_y + (row - radius) * self.cell_size
+            right = left + (2 * radius + 1) * self.cell_size
+            top = bottom + (2 * radius + 1) * self.cell_size
+            bound = min(x - left, right - x, y - bottom, top - y)
+            if best <= bound or bound > max_distance:
+                break
+
+            radius += 1
+
+        return best
+
+
+def directed_hausdorff(points, index, block_cells=8):
+    """Largest distance from any of points to the boundary in index.
+
+    Points are grouped into blocks of grid cells. The distance from a block's
+    center plus its half diagonal bounds every point in the block, so blocks
+    are visited from the largest bound down and the rest are skipped once the
+    bound drops below the running maximum.
+    """
+    if not points:
+        return 0.0
+    if index.bbox is None:
+        return math.inf
+
+    block = index.cell_size * block_cells
+    half_diagonal = block * math.sqrt(2) / 2
+    groups = defaultdict(list)
+    for x, y in points:
+        groups[(math.floor(x / block), math.floor(y / block))].append((x, y))
+
+    bounds = []
+    for (bx, by), block_points in groups.items():
+        center_distance = index.distance_to_boundary((bx + 0.5) * block, (by + 0.5) * block)
+        bounds.append((center_distance + half_diagonal, block_points))
+    bounds.sort(key=lambda item: item[0], reverse=True)
+
+    worst = 0.0
+    for upper_bound, block_points in bounds:
+        if upper_bound <= worst:
+            break
+        for x, y in block_points:
+            distance = index.distance_to_boundary(x, y, stop_below=worst)
+            if distance > worst:
+                worst = distance
+    return worst
+
+
+def difference_length(crossings_a, crossings_b):
+    """Length of a line inside exactly one of two geometries, from their sorted crossings."""
+    inside = [False, False]
+    length = 0.0
+    last = None
+    for x, which in heapq.merge(((x, 0) for x in crossings_a), ((x, 1) for x in crossings_b)):
+        if inside[0] != inside[1]:
+            length += x - last
+        inside[which] = not inside[which]
+        last = x
+    return length
+
+
+def symmetric_difference_area(index_a, index_b, bbox, lines, rng):
+    """Estimate the symmetric difference area of two geometries and its standard error.
+
+    One scanline is placed at random within each of `lines` horizontal strata.
+    Along a line the difference is exact, so thin slivers along the boundary
+    are measured rather than hit or missed by sample points; only the spacing
+    of the lines is sampled. The standard error comes from differences between
+    neighboring lines.
+    """
+    min_y, max_y = bbox[1], bbox[3]
+    step = (max_y - min_y) / lines
+    widths = []
+    for i in range(lines):
+        y = min_y + (i + rng.random()) * step
+        widths.append(difference_length(index_a.crossings(y), index_b.crossings(y)))
+
+    area = sum(widths) * step
+    variance = step ** 2 * sum((b - a) ** 2 for a, b in zip(widths, widths[1:])) / 2
+    return area, math.sqrt(variance)
+
+
+def compare_zone(original_path, variant_path, samples, match_distance, rng):
+    """Compare one variant zone file with the original zone file."""
+    original = load_polygons(original_path)
+    variant = load_polygons(variant_path)
+
+    lon_lat_bbox = polygons_bbox(original)
+    lat0 = (lon_lat_bbox[1] + lon_lat_bbox[3]) / 2
+    original = project_polygons(original, lat0)
+    variant = project_polygons(variant, lat0)
+
+    original_index = GeometryIndex(original)
+    variant_index = GeometryIndex(variant)
+    original_area = sum(polygon_area(polygon) for polygon in original)
+
+    # Symmetric area difference on scanlines over both bounding boxes
+    boxes = [box for box in (original_index.bbox, variant_index.bbox) if box]
+    bbox = (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes))
+    symmetric_difference, symmetric_error = symmetric_difference_area(original_index, variant_index, bbox, samples, rng)
+
+    # Hausdorff distance between the boundaries, over vertices in both directions
+    original_vertices = [point for polygon in original for ring in polygon for point in ring]
+    variant_vertices = [point for polygon in variant for ring in polygon for point in ring]
+    hausdorff = max(directed_hausdorff(original_vertices, variant_index),
+                    directed_hausdorff(variant_vertices, original_index))
+
+    # Original polygons with no variant geometry nearby or covering them
+    dropped = 0
+    dropped_area = 0.0
+    for polygon in original:
+        outer = polygon[0]
+        x, y = outer[0]
+        if variant_index.contains(x, y):
+            continue
+        if all(variant_index.distance_to_boundary(px, py, match_distance, match_distance) > match_distance
+               for px, py in outer):
+            dropped += 1
+            dropped_area += polygon_area(polygon)
+
+    return {
+        "polygons": (len(original), len(variant)),
+        "area": original_area,
+        "symmetric_difference": symmetric_difference,
+        "symmetric_error": symmetric_error,
+        "hausdorff": hausdorff,
+        "dropped": dropped,
+        "dropped_area": dropped_area,
+    }
+
+
+def file_stats(path, repeats=3):
+    """File size, gzip size and best-of-n JSON parse time."""
+    raw = Path(path).read_bytes()
+    parse_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        json.loads(raw)
+        parse_times.append(time.perf_counter() - start)
+    return {"bytes": len(raw), "gzip_bytes": len(gzip.compress(raw)), "parse": min(parse_times)}
+
+
+def misclassification_rate(original_dir, variant_dir, zones, count, rng):
+    """Share of sample points the variant assigns to a different zone than the original."""
+    original = {}
+    variant = {}
+    for zone in zones:
+        original[zone] = GeometryIndex(load_polygons(Path(original_dir) / f"zone_{zone}.geojson"))
+        variant[zone] = GeometryIndex(load_polygons(Path(variant_dir) / f"zone_{zone}.geojson"))
+
+    boxes = [index.bbox for index in original.values() if index.bbox]
+    bbox = (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+    def first_match(indexes, x, y):
+        for zone in zones:
+            if indexes[zone].contains(x, y):
+                return zone
+        return None
+
+    # Rejection-sample points that fall inside some original zone
+    checked = 0
+    wrong = 0
+    attempts = 0
+    while checked < count and attempts < count * 200:
+        attempts += 1
+        x = rng.uniform(bbox[0], bbox[2])
+        y = rng.uniform(bbox[1], bbox[3])
+        expected = first_match(original, x, y)
+        if expected is None:
+            continue
+        checked += 1
+        if first_match(variant, x, y) != expected:
+            wrong += 1
+
+    return wrong / checked if checked else 0.0, checked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare simplification profiles against original/ for quality and size.")
+    parser.add_argument("--root", default="../public/geojson", help="Directory holding original/ and variant directories")
+    parser.add_argument("--variants", default="balanced,simplified,ultra")
+    parser.add_argument("--samples", type=int, default=10000, help="Scanlines per zone for area difference")
+    parser.add_argument("--lookup-samples", type=int, default=2000, help="Sample points per variant for misclassification")
+    parser.add_argument("--match-distance", type=float, default=5.0,
+                        help="Original polygons farther than this (km) from the variant count as dropped")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    root = Path(args.root)
+    original_dir = root / "original"
+    rng = random.Random(args.seed)
+
+    original_zones = {path.stem.replace("zone_", "", 1) for path in original_dir.glob("*.geojson")}
+    variants = [variant.strip() for variant in args.variants.split(",") if variant.strip()]
+
+    header = (f"{'Variant':<12}{'Zone':<6}{'Polys':>12}{'Size KB':>10}{'Gzip KB':>10}{'Parse ms':>10}"
+              f"{'SymDiff km2':>13}{'± km2':>9}{'SymDiff %':>11}{'Vtx Hausdorff km':>18}"
+              f"{'Dropped':>9}{'Dropped %':>11}")
+    print(header)
+    print("-" * len(header))
+
+    summaries = []
+    for variant in variants:
+        variant_dir = root / variant
+        zones = [zone for zone in ZONE_ORDER
+                 if zone in original_zones and (variant_dir / f"zone_{zone}.geojson").exists()]
+        if not zones:
+            print(f"{variant:<12}no zones in common with original/")
+            continue
+
+        totals = defaultdict(float)
+        for zone in zones:
+            original_path = original_dir / f"zone_{zone}.geojson"
+            variant_path = variant_dir / f"zone_{zone}.geojson"
+
+            quality = compare_zone(original_path, variant_path, args.samples, args.match_distance, rng)
+            stats = file_stats(variant_path)
+
+            area = quality["area"] or 1.0
+            polygons = f"{quality['polygons'][0]}->{quality['polygons'][1]}"
+            print(f"{variant:<12}{zone:<6}{polygons:>12}{stats['bytes'] / 1024:>10.1f}{stats['gzip_bytes'] / 1024:>10.1f}"
+                  f"{stats['parse'] * 1000:>10.1f}{quality['symmetric_difference']:>13.1f}"
+                  f"{quality['symmetric_error']:>9.1f}"
+                  f"{quality['symmetric_difference'] / area * 100:>10.2f}%{quality['hausdorff']:>18.2f}"
+                  f"{quality['dropped']:>9}{quality['dropped_area'] / area * 100:>10.2f}%")
+
+            for key in ("bytes", "gzip_bytes", "parse"):
+                totals[key] += stats[key]
+            for key in ("area", "symmetric_difference", "dropped", "dropped_area"):
+                totals[key] += quality[key]
+            totals["hausdorff"] = max(totals["hausdorff"], quality["hausdorff"])
+            totals["symmetric_variance"] += quality["symmetric_error"] ** 2
+
+        rate, checked = misclassification_rate(original_dir, variant_dir, zones, args.lookup_samples, rng)
+        summaries.append((variant, len(zones), totals, rate, checked))
+
+    print(f"\n{'Variant':<12}{'Zones':>6}{'Size KB':>10}{'Gzip KB':>10}{'Parse ms':>10}{'SymDiff %':>11}{'± %':>8}"
+          f"{'Max Vtx Hausdorff km':>22}{'Dropped %':>11}{'Misclassified':>15}")
+    for variant, zone_count, totals, rate, checked in summaries:
+        area = totals["area"] or 1.0
+        print(f"{variant:<12}{zone_count:>6}{totals['bytes'] / 1024:>10.1f}{totals['gzip_bytes'] / 1024:>10.1f}"
+              f"{totals['parse'] * 1000:>10.1f}{totals['symmetric_difference'] / area * 100:>10.2f}%"
+              f"{math.sqrt(totals['symmetric_variance']) / area * 100:>7.2f}%"
+              f"{totals['hausdorff']:>22.2f}{totals['dropped_area'] / area * 100:>10.2f}%"
+              f"{rate * 100:>14.2f}%")
+    print(f"\nSymDiff is measured on {args.samples} scanlines per zone; ± is one standard error")
+    print("Vtx Hausdorff is measured from the vertices of each boundary to the other boundary")
+    print(f"Misclassification measured on {args.lookup_samples} random points inside original zones per variant")
+
+
+if __name__ == "__main__":
+    main()
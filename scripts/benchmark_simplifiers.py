@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark the line simplification engines head to head on the bundled zones.
+
+For each zone and engine, reports runtime, output vertex count, output size
+and area deviation (sum of per-ring absolute area change relative to the
+original ring area). Rings run through balanced_simplify_coordinates, so the
+uniform-sampling fallback of the balanced profile is included.
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from balanced_simplify_geojson import SIMPLIFIERS, balanced_simplify_coordinates, round_coordinates
+
+
+def ring_area(ring):
+    """Unsigned shoelace area of a ring in square degrees."""
+    area = 0.0
+    for i in range(len(ring) - 1):
+        x1, y1 = ring[i]
+        x2, y2 = ring[i + 1]
+        area += x1 * y2 - x2 * y1
+    return abs(area) / 2
+
+
+def iter_rings(geometry):
+    """Yield every ring of a Polygon or MultiPolygon geometry."""
+    if geometry["type"] == "Polygon":
+        yield from geometry["coordinates"]
+    elif geometry["type"] == "MultiPolygon":
+        for polygon in geometry["coordinates"]:
+            yield from polygon
+
+
+def benchmark_zone(rings, algorithm, tolerance, coordinate_precision):
+    """Simplify all rings of a zone with one engine and collect statistics."""
+    simplified_rings = []
+    original_area = 0.0
+    area_deviation = 0.0
+
+    start = time.perf_counter()
+    for ring in rings:
+        simplified_rings.append(balanced_simplify_coordinates(ring, tolerance, algorithm))
+    elapsed = time.perf_counter() - start
+
+    output_rings = []
+    for ring, simplified in zip(rings, simplified_rings):
+        simplified = round_coordinates(simplified, coordinate_precision)
+        area = ring_area(ring)
+        original_area += area
+
+        # Rings the pipeline would drop lose their whole area
+        if len(simplified) < 4:
+            area_deviation += area
+            continue
+
+        area_deviation += abs(ring_area(simplified) - area)
+        output_rings.append(simplified)
+
+    return {
+        "time": elapsed,
+        "vertices": sum(len(ring) for ring in output_rings),
+        "bytes": len(json.dumps(output_rings, separators=(',', ':'))),
+        "deviation": area_deviation / original_area * 100 if original_area else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare line simplification engines on the bundled zones.")
+    parser.add_argument("--input-dir", default="../public/geojson/original")
+    parser.add_argument("--tolerance", type=float, default=0.002)
+    parser.add_argument("--precision", type=int, default=4)
+    args = parser.parse_args()
+
+    geojson_files = sorted(Path(args.input_dir).glob("*.geojson"))
+    algorithms = sorted(SIMPLIFIERS)
+
+    print(f"Benchmarking {', '.join(algorithms)} on {len(geojson_files)} zones "
+          f"(tolerance={args.tolerance}, precision={args.precision})\n")
+    print(f"{'Zone':<8}{'Engine':<20}{'Vertices':>12}{'Output':>14}{'Time (s)':>10}{'Area dev':>10}")
+
+    totals = {algorithm: {"time": 0.0, "vertices": 0, "bytes": 0, "deviation": 0.0} for algorithm in algorithms}
+    input_vertices = 0
+
+    for input_file in geojson_files:
+        with open(input_file, 'r') as f:
+            geojson = json.load(f)
+
+        rings = [ring for feature in geojson["features"] if feature.get("geometry")
+                 for ring in iter_rings(feature["geometry"])]
+        input_vertices += sum(len(ring) for ring in rings)
+        zone = input_file.stem.replace("zone_", "")
+
+        for algorithm in algorithms:
+            stats = benchmark_zone(rings, algorithm, args.tolerance, args.precision)
+            for key in ("time", "vertices", "bytes"):
+                totals[algorithm][key] += stats[key]
+            totals[algorithm]["deviation"] += stats["deviation"] / len(geojson_files)
+
+            print(f"{zone:<8}{algorithm:<20}{stats['vertices']:>12,}{stats['bytes']:>14,}"
+                  f"{stats['time']:>10.3f}{stats['deviation']:>9.3f}%")
+
+    print(f"\nInput vertices: {input_vertices:,}")
+    for algorithm in algorithms:
+        total = totals[algorithm]
+        print(f"{algorithm}: {total['vertices']:,} vertices, {total['bytes']:,} bytes, "
+              f"{total['time']:.2f}s, mean area deviation {total['deviation']:.3f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Distance from a point to the nearest boundary of a neighboring zone.
+
+Built on the grid of ZoneIndex in zone_lookup_service.py, which buckets every
+ring edge by the cells it touches; the edges of one row of cells are a single
+contiguous slice. A query scans growing square blocks of cells around the
+point and stops once the nearest edge found is closer than anything outside
+the block could be, or the block reaches max_distance_km.
+
+Distances use an equirectangular projection around the query point, which is
+accurate to well under a percent at the tens of kilometers this is meant for.
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+
+from zone_geometry import KM_PER_DEGREE
+from zone_lookup_service import ZoneIndex
+
+
+class BoundaryIndex:
+    """Nearest neighboring-zone boundary queries over one variant's zone files."""
+
+    def __init__(self, zone_index, max_distance_km=50.0):
+        self.zone_index = zone_index
+        self.max_distance_km = max_distance_km
+
+    @classmethod
+    def from_directory(cls, variant_dir, cell_size=0.05, max_distance_km=50.0):
+        """Build the index from the zone_*.geojson files of a variant directory."""
+        return cls(ZoneIndex.from_directory(variant_dir, cell_size), max_distance_km)
+
+    def _cell(self, lat, lon):
+        grid = self.zone_index.grid
+        return int((lat - grid.y0) // grid.cell_size), int((lon - grid.x0) // grid.cell_size)
+
+    def _block(self, row, col, k):
+        """Edges and zone ids of the cells within k cells of (row, col)."""
+        index = self.zone_index
+        grid = index.grid
+        first_col = max(col - k, 0)
+        last_col = min(col + k, grid.cols - 1)
+        slices = []
+        if first_col <= last_col:
+            for r in range(max(row - k, 0), min(row + k, grid.rows - 1) + 1):
+                start = index.offsets[r * grid.cols + first_col]
+                end = index.offsets[r * grid.cols + last_col + 1]
+                if end > start:
+                    slices.append(slice(start, end))
+
+        if not slices:
+            return None, None
+        if len(slices) == 1:
+            return index.cell_edges[slices[0]], index.cell_zone[slices[0]]
+        return (np.concatenate([index.cell_edges[s] for s in slices]),
+                np.concatenate([index.cell_zone[s] for s in slices]))
+
+    def _block_bound(self, lat, lon, row, col, k):
+        """Distance in km from the point to the border of its k-cell block."""
+        grid = self.zone_index.grid
+        left = grid.x0 + (col - k) * grid.cell_size
+        right = grid.x0 + (col + k + 1) * grid.cell_size
+        bottom = grid.y0 + (row - k) * grid.cell_size
+        top = grid.y0 + (row + k + 1) * grid.cell_size
+        x_scale = KM_PER_DEGREE * math.cos(math.radians(lat))
+        return min((lon - left) * x_scale, (right - lon) * x_scale, (lat - bottom) * KM_PER_DEGREE,
+                   (top - lat) * KM_PER_DEGREE)
+
+    def _nearest(self, lats, lons, own_bits, edges, zone_ids):
+        """Nearest candidate edge of another zone for each point.
+
+        Returns per-point distances (km), edge positions and projection
+        parameters along the edge; distance is inf where no candidate remains.
+        """
+        x_scale = (KM_PER_DEGREE * np.cos(np.radians(lats)))[:, None]
+        x1 = (edges[:, 0] - lons[:, None]) * x_scale
+        y1 = (edges[:, 1] - lats[:, None]) * KM_PER_DEGREE
+        x2 = (edges[:, 2] - lons[:, None]) * x_scale
+        y2 = (edges[:, 3] - lats[:, None]) * KM_PER_DEGREE
+
+        # Closest point of each segment to the query point at the origin
+        dx = x2 - x1
+        dy = y2 - y1
+        length_sq = dx * dx + dy * dy
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(length_sq > 0, np.clip(-(x1 * dx + y1 * dy) / length_sq, 0.0, 1.0), 0.0)
+        distance = np.hypot(x1 + t * dx, y1 + t * dy)
+
+        # Only boundaries of zones other than the one the point is in
+        own = (own_bits[:, None] >> zone_ids[None, :].astype(np.int64)) & 1
+        distance[own.astype(bool)] = np.inf
+
+        nearest = np.argmin(distance, axis=1)
+        rows = np.arange(len(lats))
+        return distance[rows, nearest], nearest, t[rows, nearest]
+
+    def _result(self, lat, lon, own_zone, distance, edge, zone_id, t):
+        if not distance <= self.max_distance_km:
+            return {"zone": own_zone, "neighbor_zone": None, "distance_km": None, "nearest_point": None}
+        x1, y1, x2, y2 = edge
+        return {
+            "zone": own_zone,
+            "neighbor_zone": self.zone_index.zones[int(zone_id)],
+            "distance_km": float(distance),
+            "nearest_point": [float(y1 + t * (y2 - y1)), float(x1 + t * (x2 - x1))],
+        }
+
+    def _own_zone(self, lat, lon):
+        """Zone the point resolves to and the bitmask of zones whose boundaries do not count."""
+        zone = self.zone_index.lookup(lat, lon)
+        if zone is None:
+            return None, 0
+        return zone, 1 << self.zone_index.zones.index(zone)
+
+    def nearest_boundary(self, lat, lon):
+        """Nearest boundary of a zone other than the point's own zone.
+
+        Returns a dict with the point's zone, the neighboring zone, the distance
+        in km and the nearest boundary point as [lat, lon]; neighbor_zone is
+        None when no other zone is within max_distance_km.
+        """
+        own_zone, own_bits = self._own_zone(lat, lon)
+        row, col = self._cell(lat, lon)
+        lats = np.array([lat])
+        lons = np.array([lon])
+        bits = np.array([own_bits], dtype=np.int64)
+
+        best = (math.inf, None, None, 0.0)
+        k = 1
+        while True:
+            edges, zone_ids = self._block(row, col, k)
+            if edges is not None:
+                distance, nearest, t = self._nearest(lats, lons, bits, edges, zone_ids)
+                if distance[0] < best[0]:
+                    best = (distance[0], edges[nearest[0]], zone_ids[nearest[0]], t[0])
+
+            bound = self._block_bound(lat, lon, row, col, k)
+            if best[0] <= bound or bound >= self.max_distance_km:
+                break
+            k *= 2
+
+        return self._result(lat, lon, own_zone, best[0], best[1], best[2], best[3])
+
+    def nearest_boundaries(self, points):
+        """Batch nearest_boundary for a sequence of (lat, lon) points.
+
+        Points are grouped by grid cell so each group shares one candidate
+        block; points whose answer is not settled by it fall back to the
+        single-point search.
+        """
+        results = [None] * len(points)
+        groups = {}
+        for i, (lat, lon) in enumerate(points):
+            groups.setdefault(self._cell(lat, lon), []).append(i)
+
+        for (row, col), members in groups.items():
+            edges, zone_ids = self._block(row, col, 1)
+            if edges is None:
+                for i in members:
+                    results[i] = self.nearest_boundary(*points[i])
+                continue
+
+            lats = np.array([points[i][0] for i in members])
+            lons = np.array([points[i][1] for i in members])
+            own = [self._own_zone(points[i][0], points[i][1]) for i in members]
+            bits = np.array([own_bits for _, own_bits in own], dtype=np.int64)
+            distance, nearest, t = self._nearest(lats, lons, bits, edges, zone_ids)
+
+            for j, i in enumerate(members):
+                lat, lon = points[i]
+                bound = self._block_bound(lat, lon, row, col, 1)
+                if distance[j] <= bound or bound >= self.max_distance_km:
+                    results[i] = self._result(lat, lon, own[j][0], distance[j], edges[nearest[j]],
+                                              zone_ids[nearest[j]], t[j])
+                else:
+                    results[i] = self.nearest_boundary(lat, lon)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distance from a point to the nearest neighboring zone.")
+    parser.add_argument("lat", type=float)
+    parser.add_argument("lon", type=float)
+    parser.add_argument("--variant-dir", default="../public/geojson/balanced")
+    parser.add_argument("--max-distance", type=float, default=50.0, help="Search radius in km (default: 50)")
+    parser.add_argument("--cell-size", type=float, default=0.05, help="Index cell size in degrees")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = BoundaryIndex.from_directory(args.variant_dir, args.cell_size, args.max_distance)
+    print(f"Indexed {args.variant_dir} in {time.perf_counter() - started:.1f}s")
+
+    result = index.nearest_boundary(args.lat, args.lon)
+    zone = result["zone"] or "no zone"
+    if result["neighbor_zone"] is None:
+        print(f"{zone}: no other zone within {args.max_distance:g} km")
+    else:
+        lat, lon = result["nearest_point"]
+        print(f"{zone}: {result['distance_km']:.2f} km from zone {result['neighbor_zone']} "
+              f"(nearest boundary point {lat:.5f}, {lon:.5f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Detect gaps and overlaps between neighboring zones of a simplified variant.
+
+Every zone of a variant is rasterized onto one shared grid with a vectorized
+scanline fill. Each cell stores a bitmask of the zones covering it, so
+coverage counts and the zones involved come straight from the grid. Cells
+covered in original/ but by no zone of the variant are gaps; cells covered
+by two or more zones of the variant but not in original/ are overlaps.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from zone_geometry import ZONE_ORDER, Grid, coverage_bits, load_rings, rings_bbox
+
+
+def popcount(bits):
+    """Number of set bits per cell."""
+    counts = np.zeros(bits.shape, dtype=np.uint8)
+    remaining = bits.copy()
+    while remaining.any():
+        counts += (remaining & 1).astype(np.uint8)
+        remaining >>= 1
+    return counts
+
+
+def zones_in(bitmask, zones):
+    """Decode a bitmask into zone names."""
+    return [zone for index, zone in enumerate(zones) if bitmask >> index & 1]
+
+
+def hotspots(mask, grid, block_degrees, limit):
+    """Group flagged cells into coarse blocks and return the largest by area."""
+    rows, cols = np.nonzero(mask)
+    if len(rows) == 0:
+        return []
+
+    block_cells = max(1, int(round(block_degrees / grid.cell_size)))
+    block_rows = rows // block_cells
+    block_cols = cols // block_cells
+    areas = grid.row_area_km2[rows]
+
+    keys = block_rows * (grid.cols // block_cells + 1) + block_cols
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    block_area = np.bincount(inverse, weights=areas)
+    block_count = np.bincount(inverse)
+
+    spots = []
+    for i in np.argsort(block_area)[::-1][:limit]:
+        # Report the centroid of the flagged cells in the block
+        in_block = inverse == i
+        lon, lat = grid.cell_center(rows[in_block].mean(), cols[in_block].mean())
+        spots.append({"lat": round(float(lat), 4), "lon": round(float(lon), 4),
+                      "area_km2": round(float(block_area[i]), 1), "cells": int(block_count[i])})
+    return spots
+
+
+def analyze_variant(root, variant, cell_size=0.02, block_degrees=1.0, limit=10):
+    """Compare zone coverage of a variant with original/ on a shared grid."""
+    root = Path(root)
+    original_dir = root / "original"
+    variant_dir = root / variant
+
+    zones = [zone for zone in ZONE_ORDER
+             if (original_dir / f"zone_{zone}.geojson").exists() and (variant_dir / f"zone_{zone}.geojson").exists()]
+    if not zones:
+        raise ValueError(f"No zones in common between original/ and {variant}/")
+
+    original_rings = {zone: load_rings(original_dir / f"zone_{zone}.geojson") for zone in zones}
+    variant_rings = {zone: load_rings(variant_dir / f"zone_{zone}.geojson") for zone in zones}
+
+    boxes = [rings_bbox(rings) for rings in list(original_rings.values()) + list(variant_rings.values()) if rings]
+    bbox = (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes))
+    grid = Grid(bbox, cell_size)
+
+    original_bits = coverage_bits(original_rings, zones, grid)
+    variant_bits = coverage_bits(variant_rings, zones, grid)
+    original_count = popcount(original_bits)
+    variant_count = popcount(variant_bits)
+
+    cell_area = np.broadcast_to(grid.row_area_km2[:, None], original_bits.shape)
+    covered = original_count >= 1
+    gaps = covered & (variant_count == 0)
+    overlaps = (variant_count >= 2) & (original_count < 2)
+
+    covered_area = float(cell_area[covered].sum())
+    gap_area = float(cell_area[gaps].sum())
+    overlap_area = float(cell_area[overlaps].sum())
+
+    # Which original zones lost coverage in the gaps
+    gap_zones = {}
+    values, inverse = np.unique(original_bits[gaps], return_inverse=True)
+    areas = np.bincount(inverse, weights=cell_area[gaps]) if len(values) else []
+    for value, area in zip(values, areas):
+        for zone in zones_in(int(value), zones):
+            gap_zones[zone] = gap_zones.get(zone, 0.0) + float(area)
+
+    # Which zone combinations overlap
+    overlap_pairs = {}
+    values, inverse = np.unique(variant_bits[overlaps], return_inverse=True)
+    areas = np.bincount(inverse, weights=cell_area[overlaps]) if len(values) else []
+    for value, area in zip(values, areas):
+        overlap_pairs["+".join(zones_in(int(value), zones))] = float(area)
+
+    return {
+        "variant": variant,
+        "zones": zones,
+        "grid": {"cell_size": cell_size, "rows": grid.rows, "cols": grid.cols},
+        "covered_km2": covered_area,
+        "gap_km2": gap_area,
+        "gap_percent": gap_area / covered_area * 100 if covered_area else 0.0,
+        "overlap_km2": overlap_area,
+        "overlap_percent": overlap_area / covered_area * 100 if covered_area else 0.0,
+        "original_overlap_km2": float(cell_area[original_count >= 2].sum()),
+        "gap_zones": dict(sorted(gap_zones.items(), key=lambda item: -item[1])),
+        "overlap_zones": dict(sorted(overlap_pairs.items(), key=lambda item: -item[1])),
+        "gap_hotspots": hotspots(gaps, grid, block_degrees, limit),
+        "overlap_hotspots": hotspots(overlaps, grid, block_degrees, limit),
+    }
+
+
+def print_report(report):
+    """Print a human-readable coverage report for one variant."""
+    grid = report["grid"]
+    print(f"Variant: {report['variant']} ({len(report['zones'])} zones, "
+          f"grid {grid['cell_size']}° = {grid['cols']:,} x {grid['rows']:,} cells)")
+    print(f"  Covered in original: {report['covered_km2']:,.0f} km² "
+          f"(original overlaps: {report['original_overlap_km2']:,.0f} km²)")
+    print(f"  Gaps:     {report['gap_km2']:,.0f} km² ({report['gap_percent']:.2f}%)")
+    print(f"  Overlaps: {report['overlap_km2']:,.0f} km² ({report['overlap_percent']:.2f}%)")
+
+    if report["gap_zones"]:
+        print("  Coverage lost by zone: " + ", ".join(
+            f"{zone} {area:,.0f} km²" for zone, area in report["gap_zones"].items()))
+    if report["overlap_zones"]:
+        print("  Overlapping zones: " + ", ".join(
+            f"{zones} {area:,.0f} km²" for zones, area in report["overlap_zones"].items()))
+
+    for label, key in (("gap", "gap_hotspots"), ("overlap", "overlap_hotspots")):
+        for spot in report[key]:
+            print(f"    {label} at {spot['lat']:.3f}, {spot['lon']:.3f}: {spot['area_km2']:,.1f} km²")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report gaps and overlaps between zones of simplified variants.")
+    parser.add_argument("--root", default="../public/geojson", help="Directory holding original/ and variant directories")
+    parser.add_argument("--variants", default="balanced,simplified,ultra")
+    parser.add_argument("--cell-size", type=float, default=0.02, help="Grid cell size in degrees")
+    parser.add_argument("--block-size", type=float, default=1.0, help="Hotspot block size in degrees")
+    parser.add_argument("--hotspots", type=int, default=5, help="Number of gap/overlap locations to list")
+    parser.add_argument("--report", default=None, help="Write the full report as JSON to this path")
+    parser.add_argument("--max-gap-percent", type=float, default=None, help="Exit with an error above this gap share")
+    parser.add_argument("--max-overlap-percent", type=float, default=None,
+                        help="Exit with an error above this overlap share")
+    args = parser.parse_args()
+
+    reports = []
+    failed = False
+    for variant in [variant.strip() for variant in args.variants.split(",") if variant.strip()]:
+        report = analyze_variant(args.root, variant, args.cell_size, args.block_size, args.hotspots)
+        print_report(report)
+        reports.append(report)
+
+        if args.max_gap_percent is not None and report["gap_percent"] > args.max_gap_percent:
+            print(f"Error: {variant} gaps exceed {args.max_gap_percent}%")
+            failed = True
+        if args.max_overlap_percent is not None and report["overlap_percent"] > args.max_overlap_percent:
+            print(f"Error: {variant} overlaps exceed {args.max_overlap_percent}%")
+            failed = True
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(reports, f, indent=2)
+        print(f"Report written to {args.report}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Dissolve edge-adjacent polygons of the same zone into larger polygons.
+
+Every ring edge is added to a hashed edge index with outer rings oriented
+counter-clockwise and holes clockwise. An edge shared by two neighboring
+polygons appears once in each direction, so the pair cancels. The remaining
+edges are stitched back into rings. Run this before simplification so shared
+interior edges are neither simplified nor shipped.
+
+Where a vertex of one polygon lies on an edge of another (a T-junction, e.g.
+a 2x2 square next to two 1x1 squares), the edge is first split at that
+vertex so the shared parts match exactly. Edges otherwise cancel only when
+their end points are identical: polygons that merely touch at a corner, as
+in the bundled zone files, are left as they are.
+"""
+
+import argparse
+import json
+import math
+import os
+from collections import defaultdict
+from pathlib import Path
+
+
+def signed_area(ring):
+    """Signed shoelace area of a ring (positive when counter-clockwise)."""
+    area = 0.0
+    for i in range(len(ring) - 1):
+        x1, y1 = ring[i]
+        x2, y2 = ring[i + 1]
+        area += x1 * y2 - x2 * y1
+    return area / 2
+
+
+def orient_ring(ring, counter_clockwise=True):
+    """Return the ring oriented counter-clockwise (or clockwise)."""
+    if (signed_area(ring) > 0) != counter_clockwise:
+        return ring[::-1]
+    return ring
+
+
+def point_in_ring(point, ring):
+    """Ray casting point-in-ring test."""
+    x, y = point
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i]
+        xj, yj = ring[j]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def ring_bbox(ring):
+    """Bounding box (min_x, min_y, max_x, max_y) of a ring."""
+    xs = [point[0] for point in ring]
+    ys = [point[1] for point in ring]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def interior_point(ring):
+    """A point strictly inside a ring: an edge midpoint nudged off the edge toward the interior.
+
+    Vertices of stitched rings often lie on a neighboring ring too, so they
+    cannot decide containment on their own.
+    """
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+        length = math.hypot(x2 - x1, y2 - y1)
+        if length == 0:
+            continue
+        mid_x = (x1 + x2) / 2
+        mid_y = (y1 + y2) / 2
+        # Try a few offsets in case the ring is thinner than the larger ones
+        for scale in (1e-3, 1e-6, 1e-9):
+            for side in (1, -1):
+                point = (mid_x - side * (y2 - y1) * scale, mid_y + side * (x2 - x1) * scale)
+                if point_in_ring(point, ring):
+                    return point
+    return None
+
+
+def oriented_edges(polygon):
+    """Yield the directed edges of a polygon, outer ring counter-clockwise and holes clockwise."""
+    for ring_index, ring in enumerate(polygon):
+        if len(ring) < 4:
+            continue
+        ring = orient_ring(ring, counter_clockwise=(ring_index == 0))
+        for a, b in zip(ring, ring[1:]):
+            a = tuple(a[:2])
+            b = tuple(b[:2])
+            if a != b:
+                yield a, b
+
+
+def split_at_junctions(polygons, tolerance=1e-9):
+    """Split every edge at the vertices of other polygons that lie on it.
+
+    Vertices are bucketed in a uniform grid, so each edge only tests the
+    vertices in the cells its bounding box covers.
+    """
+    owners = defaultdict(set)
+    lengths = []
+    for index, polygon in enumerate(polygons):
+        for ring in polygon:
+            for a, b in zip(ring, ring[1:]):
+                owners[tuple(a[:2])].add(index)
+                lengths.append(math.hypot(b[0] - a[0], b[1] - a[1]))
+    if not lengths:
+        return polygons
+
+    cell_size = max(sum(lengths) / len(lengths), tolerance)
+    cells = defaultdict(list)
+    for point in owners:
+        cells[(math.floor(point[0] / cell_size), math.floor(point[1] / cell_size))].append(point)
+
+    split = []
+    for index, polygon in enumerate(polygons):
+        split_polygon = []
+        for ring in polygon:
+            split_ring = [ring[0]] if ring else []
+            for a, b in zip(ring, ring[1:]):
+                dx = b[0] - a[0]
+                dy = b[1] - a[1]
+                length_squared = dx * dx + dy * dy
+                junctions = []
+                if length_squared:
+                    length = math.sqrt(length_squared)
+                    for col in range(math.floor((min(a[0], b[0]) - tolerance) / cell_size),
+                                     math.floor((max(a[0], b[0]) + tolerance) / cell_size) + 1):
+                        for row in range(math.floor((min(a[1], b[1]) - tolerance) / cell_size),
+                                         math.floor((max(a[1], b[1]) + tolerance) / cell_size) + 1):
+                            for point in cells.get((col, row), ()):
+                                if owners[point] == {index}:
+                                    continue
+                                t = ((point[0] - a[0]) * dx + (point[1] - a[1]) * dy) / length_squared
+                                if not tolerance < t * length < length - tolerance:
+                                    continue
+                                if abs((point[0] - a[0]) * dy - (point[1] - a[1]) * dx) / length <= tolerance:
+                                    junctions.append((t, point))
+                split_ring.extend(list(point) for _, point in sorted(junctions))
+                split_ring.append(b)
+            split_polygon.append(split_ring)
+        split.append(split_polygon)
+    return split
+
+
+def find_touching_polygons(polygons):
+    """Return the indices of polygons that share at least one edge with another polygon."""
+    owners = {}
+    touching = set()
+
+    for index, polygon in enumerate(polygons):
+        for a, b in oriented_edges(polygon):
+            owner = owners.get((b, a))
+            if owner is not None and owner != index:
+                touching.add(owner)
+                touching.add(index)
+            owners[(a, b)] = index
+
+    return touching
+
+
+def build_edge_index(polygons):
+    """Build the directed edge index, cancelling edges shared by two polygons."""
+    edges = defaultdict(int)
+
+    for polygon in polygons:
+        for a, b in oriented_edges(polygon):
+            if edges.get((b, a)):
+                # Shared edge: the neighbor already added it the other way round
+                edges[(b, a)] -= 1
+                if not edges[(b, a)]:
+                    del edges[(b, a)]
+            else:
+                edges[(a, b)] += 1
+
+    return edges
+
+
+def leftmost_turn(previous, current, candidates):
+    """Pick the outgoing end point that turns furthest left at a shared vertex."""
+    dx1 = current[0] - previous[0]
+    dy1 = current[1] - previous[1]
+    best = None
+    best_angle = None
+    for candidate in candidates:
+        dx2 = candidate[0] - current[0]
+        dy2 = candidate[1] - current[1]
+        angle = math.atan2(dx1 * dy2 - dy1 * dx2, dx1 * dx2 + dy1 * dy2)
+        if best_angle is None or angle > best_angle:
+            best = candidate
+            best_angle = angle
+    return best
+
+
+def stitch_rings(edges):
+    """Stitch the remaining directed edges into closed rings.
+
+    Polygon interiors are always on the left of an edge, so taking the leftmost
+    turn where several edges leave a vertex keeps polygons that only touch at a
+    corner as separate rings.
+    """
+    outgoing = defaultdict(list)
+    for (a, b), count in edges.items():
+        outgoing[a].extend([b] * count)
+
+    rings = []
+    for start in list(outgoing):
+        while outgoing[start]:
+            ring = [start]
+            previous = start
+            current = outgoing[start].pop()
+            while current != start:
+                ring.append(current)
+                candidates = outgoing[current]
+                if not candidates:
+                    # Open chain from malformed input; drop it
+                    ring = None
+                    break
+                if len(candidates) == 1:
+                    following = candidates.pop()
+                else:
+                    following = leftmost_turn(previous, current, candidates)
+                    candidates.remove(following)
+                previous, current = current, following
+
+            if ring and len(ring) >= 3:
+                ring.append(start)
+                rings.append([list(point) for point in ring])
+
+    return rings
+
+
+def assemble_polygons(rings):
+    """Group stitched rings into polygons: outer rings first, holes assigned to the smallest containing outer ring."""
+    outers = []
+    holes = []
+    for ring in rings:
+        area = signed_area(ring)
+        if area > 0:
+            outers.append((area, ring_bbox(ring), ring))
+        elif area < 0:
+            holes.append(ring)
+
+    # Smallest outer rings first so holes go to the innermost container
+    outers.sort(key=lambda item: item[0])
+    polygons = [[ring] for _, _, ring in outers]
+
+    for hole in holes:
+        min_x, min_y, max_x, max_y = ring_bbox(hole)
+        point = interior_point(hole)
+        owner = None
+        if point is not None:
+            for i, (_, bbox, outer) in enumerate(outers):
+                if (bbox[0] <= min_x and bbox[1] <= min_y and bbox[2] >= max_x and bbox[3] >= max_y
+                        and point_in_ring(point, outer)):
+                    owner = i
+                    break
+
+        # Dropping the hole would silently fill it in
+        if owner is None:
+            raise ValueError(f"Hole at {hole[0]} lies inside no dissolved outer ring")
+        polygons[owner].append(hole)
+
+    # Largest polygons first, as a reader would expect
+    polygons.reverse()
+    return polygons
+
+
+def dissolve_polygons(polygons):
+    """Dissolve a list of GeoJSON polygon coordinate arrays.
+
+    Polygons that share no edge with another polygon are passed through unchanged.
+    """
+    split = split_at_junctions(polygons)
+    touching = find_touching_polygons(split)
+    if not touching:
+        return polygons
+
+    edges = build_edge_index([split[i] for i in sorted(touching)])
+    merged = assemble_polygons(stitch_rings(edges))
+    untouched = [polygon for i, polygon in enumerate(polygons) if i not in touching]
+    return merged + untouched
+
+
+def dissolve_geometry(geometry):
+    """Dissolve adjacent polygons of a Polygon or MultiPolygon geometry."""
+    if geometry["type"] == "Polygon":
+        polygons = [geometry["coordinates"]]
+    elif geometry["type"] == "MultiPolygon":
+        polygons = geometry["coordinates"]
+    else:
+        return geometry
+
+    dissolved = dissolve_polygons(polygons)
+
+    if len(dissolved) == 1:
+        return {
+            "type": "Polygon",
+            "coordinates": dissolved[0]
+        }
+
+    return {
+        "type": "MultiPolygon",
+        "coordinates": dissolved
+    }
+
+
+def dissolve_geojson(geojson):
+    """Return a copy of a zone FeatureCollection with each feature dissolved."""
+    features = []
+    for feature in geojson["features"]:
+        feature = dict(feature)
+        if feature.get("geometry"):
+            feature["geometry"] = dissolve_geometry(feature["geometry"])
+        features.append(feature)
+    return dict(geojson, features=features)
+
+
+def count_polygons_and_vertices(geojson):
+    """Count polygons and vertices across all features."""
+    polygons = 0
+    vertices = 0
+    for feature in geojson["features"]:
+        geometry = feature.get("geometry")
+        if not geometry:
+            continue
+        coordinates = [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+        polygons += len(coordinates)
+        vertices += sum(len(ring) for polygon in coordinates for ring in polygon)
+    return polygons, vertices
+
+
+def dissolve_geojson_file(input_path, output_path):
+    """Dissolve a GeoJSON file."""
+    try:
+        with open(input_path, 'r') as f:
+            geojson = json.load(f)
+
+        polygons_before, vertices_before = count_polygons_and_vertices(geojson)
+        geojson = dissolve_geojson(geojson)
+        polygons_after, vertices_after = count_polygons_and_vertices(geojson)
+
+        with open(output_path, 'w') as f:
+            json.dump(geojson, f, indent=2)
+
+        print(f"Dissolved {os.path.basename(input_path)}: {polygons_before:,} -> {polygons_after:,} polygons, "
+              f"{vertices_before:,} -> {vertices_after:,} vertices")
+        if polygons_after == polygons_before:
+            print("  No shared edges: polygons only touch at corners, if at all")
+
+        return True
+
+    except Exception as e:
+        print(f"Error processing {input_path}: {e}")
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dissolve edge-adjacent polygons of each zone.")
+    parser.add_argument("--input-dir", default="../data/geojson/original")
+    parser.add_argument("--output-dir", default="../data/geojson/dissolved")
+    args = parser.parse_args()
+
+    # Create output directory
+    Path(args.output_dir).mkdir(exist_ok=True)
+
+    # Get all GeoJSON files
+    geojson_files = sorted(Path(args.input_dir).glob("*.geojson"))
+
+    print(f"Dissolving {len(geojson_files)} GeoJSON files...\n")
+
+    for input_file in geojson_files:
+        output_file = Path(args.output_dir) / input_file.name
+        dissolve_geojson_file(str(input_file), str(output_file))
+
+    print(f"\nDissolved files written to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
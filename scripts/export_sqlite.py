@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Export every zone and variant into one SQLite database with an R*Tree index.
+
+Each polygon becomes one row of `polygons` with its geometry as a compact
+blob: coordinates in fixed point, delta-encoded per ring and zlib-compressed.
+Its bounding box goes into the `polygon_index` R*Tree, with the variant as a
+third dimension so a query only visits boxes of its own variant. Zone
+properties and the colors extracted by convert_kml_with_colors.py are kept
+once per zone in `zones`.
+
+The query helpers answer point and bbox queries through the R*Tree and only
+read geometry blobs of candidate polygons:
+
+    python export_sqlite.py export
+    python export_sqlite.py point 47.61 -122.33 --variant balanced
+    python export_sqlite.py bbox -123 47 -122 48 --variant ultra
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+from pathlib import Path
+
+from dissolve_geojson import point_in_ring
+from zone_geometry import ZONE_ORDER
+
+
+VARIANTS = ["original", "simplified", "balanced", "ultra"]
+ZONE_PROPERTIES = ["title", "temperature_range", "gridcode"]
+COLOR_PROPERTIES = ["line_color", "fill_color", "fill"]
+
+SCHEMA = """
+CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE variants (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE zones (
+    zone TEXT PRIMARY KEY,
+    title TEXT,
+    temperature_range TEXT,
+    gridcode TEXT,
+    line_color TEXT,
+    fill_color TEXT,
+    fill INTEGER
+);
+CREATE TABLE polygons (
+    id INTEGER PRIMARY KEY,
+    variant_id INTEGER NOT NULL REFERENCES variants(id),
+    zone TEXT NOT NULL REFERENCES zones(zone),
+    rings INTEGER NOT NULL,
+    vertices INTEGER NOT NULL,
+    geometry BLOB NOT NULL
+);
+CREATE INDEX polygons_variant_zone ON polygons (variant_id, zone);
+CREATE VIRTUAL TABLE polygon_index USING rtree(id, min_x, max_x, min_y, max_y, min_variant, max_variant);
+"""
+
+
+def encode_polygon(polygon, scale):
+    """Encode a GeoJSON polygon's rings as a zlib-compressed fixed-point delta blob.
+
+    Layout before compression: ring count, vertex count per ring (uint32),
+    then per ring the first vertex and the deltas to each following vertex
+    as interleaved int64 x, y values.
+    """
+    header = array('I', [len(polygon)] + [len(ring) for ring in polygon])
+    values = array('q')
+    for ring in polygon:
+        previous_x = previous_y = 0
+        for point in ring:
+            x = round(point[0] * scale)
+            y = round(point[1] * scale)
+            values.append(x - previous_x)
+            values.append(y - previous_y)
+            previous_x, previous_y = x, y
+
+    if sys.byteorder == 'big':
+        header.byteswap()
+        values.byteswap()
+    return zlib.compress(header.tobytes() + values.tobytes(), 6)
+
+
+def decode_polygon(blob, scale):
+    """Decode a geometry blob back into a list of rings of [lon, lat] pairs."""
+    data = zlib.decompress(blob)
+    ring_count = array('I', data[:4])
+    if sys.byteorder == 'big':
+        ring_count.byteswap()
+
+    header = array('I', data[:4 * (ring_count[0] + 1)])
+    values = array('q', data[4 * (ring_count[0] + 1):])
+    if sys.byteorder == 'big':
+        header.byteswap()
+        values.byteswap()
+
+    rings = []
+    offset = 0
+    for count in header[1:]:
+        xs = accumulate(values[offset:offset + 2 * count:2])
+        ys = accumulate(values[offset + 1:offset + 2 * count:2])
+        rings.append([[x / scale, y / scale] for x, y in zip(xs, ys)])
+        offset += 2 * count
+    return rings
+
+
+def polygon_contains(rings, lon, lat):
+    """Even-odd point-in-polygon test that honors holes."""
+    inside = False
+    for ring in rings:
+        if point_in_ring((lon, lat), ring):
+            inside = not inside
+    return inside
+
+
+def iter_polygons(geometry):
+    """Yield the polygons of a Polygon or MultiPolygon geometry."""
+    if not geometry:
+        return
+    if geometry["type"] == "Polygon":
+        yield geometry["coordinates"]
+    elif geometry["type"] == "MultiPolygon":
+        yield from geometry["coordinates"]
+
+
+def zone_files(variant_dir):
+    """Zone files of a variant directory in zone order."""
+    return [(zone, Path(variant_dir) / f"zone_{zone}.geojson") for zone in ZONE_ORDER
+            if (Path(variant_dir) / f"zone_{zone}.geojson").exists()]
+
+
+def export_database(input_root, output_path, variants=VARIANTS, colors_dir=None, decimals=7):
+    """Write every zone of every variant under input_root into a new SQLite database."""
+    input_root = Path(input_root)
+    output_path = Path(output_path)
+    scale = 10 ** decimals
+
+    # Build next to the target and rename into place when complete
+    temp_path = output_path.with_name(output_path.name + ".tmp")
+    if temp_path.exists():
+        temp_path.unlink()
+
+    connection = sqlite3.connect(temp_path)
+    try:
+        connection.executescript(SCHEMA)
+        connection.executemany("INSERT INTO metadata VALUES (?, ?)", [
+            ("format", "zone-polygons/1"),
+            ("coordinate_scale", str(scale)),
+            ("zone_order", json.dumps(ZONE_ORDER)),
+        ])
+
+        zones = {}
+        counts = {}
+        for variant_id, variant in enumerate(variants, start=1):
+            variant_dir = input_root / variant
+            if not variant_dir.is_dir():
+                print(f"Skipping {variant}: {variant_dir} not found")
+                continue
+            connection.execute("INSERT INTO variants VALUES (?, ?)", (variant_id, variant))
+
+            polygons = 0
+            for zone, path in zone_files(variant_dir):
+                with open(path, 'r') as f:
+                    geojson = json.load(f)
+
+                for feature in geojson["features"]:
+                    properties = feature.get("properties", {})
+                    zones.setdefault(zone, {key: properties.get(key) for key in ZONE_PROPERTIES})
+
+                    for polygon in iter_polygons(feature.get("geometry")):
+                        outer = polygon[0] if polygon else []
+                        if len(outer) < 4:
+                            continue
+                        xs = [point[0] for point in outer]
+                        ys = [point[1] for point in outer]
+
+                        cursor = connection.execute(
+                            "INSERT INTO polygons (variant_id, zone, rings, vertices, geometry) VALUES (?, ?, ?, ?, ?)",
+                            (variant_id, zone, len(polygon), sum(len(ring) for ring in polygon),
+                             encode_polygon(polygon, scale)))
+                        connection.execute(
+                            "INSERT INTO polygon_index VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (cursor.lastrowid, min(xs), max(xs), min(ys), max(ys), variant_id, variant_id))
+                        polygons += 1
+            counts[variant] = polygons
+
+        # Colors extracted from the KML styles, where available
+        for zone, path in zone_files(colors_dir) if colors_dir and Path(colors_dir).is_dir() else []:
+            with open(path, 'r') as f:
+                features = json.load(f)["features"]
+            if zone in zones and features:
+                properties = features[0].get("properties", {})
+                zones[zone].update({key: properties.get(key) for key in COLOR_PROPERTIES})
+
+        connection.executemany(
+            "INSERT INTO zones VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(zone, info.get("title"), info.get("temperature_range"), info.get("gridcode"),
+              info.get("line_color"), info.get("fill_color"),
+              None if info.get("fill") is None else int(info["fill"]))
+             for zone, info in zones.items()])
+
+        connection.commit()
+        connection.execute("VACUUM")
+    except BaseException:
+        # Leave no half-written database behind
+        connection.close()
+        temp_path.unlink(missing_ok=True)
+        raise
+    connection.close()
+    os.replace(temp_path, output_path)
+    return counts
+
+
+class ZoneDatabase:
+    """Point and bbox queries against an exported zone database."""
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(f"file:{Path(path).resolve()}?mode=ro", uri=True)
+        metadata = dict(self.connection.execute("SELECT key, value FROM metadata"))
+        self.scale = int(metadata["coordinate_scale"])
+        self.zone_order = json.loads(metadata["zone_order"])
+        self.variants = dict(self.connection.execute("SELECT name, id FROM variants"))
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _variant_id(self, variant):
+        if variant not in self.variants:
+            raise ValueError(f"Unknown variant {variant!r}; available: {', '.join(self.variants)}")
+        return self.variants[variant]
+
+    def zone_info(self, zone):
+        """Properties and colors of a zone."""
+        cursor = self.connection.execute("SELECT * FROM zones WHERE zone = ?", (zone,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip((column[0] for column in cursor.description), row))
+
+    def _containing_zones(self, lat, lon, variant):
+        """Yield the zones containing a point in frontend lookup order.
+
+        Candidates come from the R*Tree without their geometry; blobs are read
+        one by one, and not at all for zones already known to contain the point.
+        """
+        variant_id = self._variant_id(variant)
+        candidates = self.connection.execute(
+            "SELECT p.id, p.zone, p.vertices FROM polygon_index AS r JOIN polygons AS p ON p.id = r.id "
+            "WHERE r.min_x <= ? AND r.max_x >= ? AND r.min_y <= ? AND r.max_y >= ? "
+            "AND r.min_variant <= ? AND r.max_variant >= ?",
+            (lon, lon, lat, lat, variant_id, variant_id)).fetchall()
+
+        # Smallest polygons first within each zone, as they are cheapest to test
+        rank = {zone: i for i, zone in enumerate(self.zone_order)}
+        candidates.sort(key=lambda row: (rank.get(row[1], len(rank)), row[2]))
+
+        found = None
+        for polygon_id, zone, _ in candidates:
+            if zone == found:
+                continue
+            (blob,) = self.connection.execute("SELECT geometry FROM polygons WHERE id = ?", (polygon_id,)).fetchone()
+            if polygon_contains(decode_polygon(blob, self.scale), lon, lat):
+                found = zone
+                yield zone
+
+    def zones_at(self, lat, lon, variant="balanced"):
+        """Zones whose polygons contain a point, in frontend lookup order."""
+        return list(self._containing_zones(lat, lon, variant))
+
+    def zone_at(self, lat, lon, variant="balanced"):
+        """First zone containing a point, or None."""
+        return next(self._containing_zones(lat, lon, variant), None)
+
+    def polygons_in_bbox(self, min_lon, min_lat, max_lon, max_lat, variant="balanced", geometry=True):
+        """Polygons whose bounding boxes intersect a bbox.
+
+        Returns dicts with id, zone and bbox, plus the decoded rings as
+        coordinates when geometry is true.
+        """
+        variant_id = self._variant_id(variant)
+        columns = "r.id, p.zone, r.min_x, r.min_y, r.max_x, r.max_y" + (", p.geometry" if geometry else "")
+        rows = self.connection.execute(
+            f"SELECT {columns} FROM polygon_index AS r JOIN polygons AS p ON p.id = r.id "
+            "WHERE r.max_x >= ? AND r.min_x <= ? AND r.max_y >= ? AND r.min_y <= ? "
+            "AND r.min_variant <= ? AND r.max_variant >= ?",
+            (min_lon, max_lon, min_lat, max_lat, variant_id, variant_id))
+
+        results = []
+        for row in rows:
+            result = {"id": row[0], "zone": row[1], "bbox": list(row[2:6])}
+            if geometry:
+                result["coordinates"] = decode_polygon(row[6], self.scale)
+            results.append(result)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export zones to SQLite and query the export.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write all zones and variants into a SQLite database")
+    export_parser.add_argument("--input-root", default="../public/geojson")
+    export_parser.add_argument("--colors-dir", default="../public/geojson/with_colors")
+    export_parser.add_argument("--output", default="../data/zones.sqlite")
+    export_parser.add_argument("--variants", default=",".join(VARIANTS),
+                               help=f"Comma-separated variants (default: {','.join(VARIANTS)})")
+    export_parser.add_argument("--decimals", type=int, default=7,
+                               help="Decimal places kept in the fixed-point coordinates (default: 7, about 1 cm)")
+
+    point_parser = subparsers.add_parser("point", help="Zones containing a point")
+    point_parser.add_argument("lat", type=float)
+    point_parser.add_argument("lon", type=float)
+
+    bbox_parser = subparsers.add_parser("bbox", help="Polygons intersecting a bbox")
+    for name in ("min_lon", "min_lat", "max_lon", "max_lat"):
+        bbox_parser.add_argument(name, type=float)
+
+    for query_parser in (point_parser, bbox_parser):
+        query_parser.add_argument("--database", default="../data/zones.sqlite")
+        query_parser.add_argument("--variant", default="balanced")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        variants = [variant.strip() for variant in args.variants.split(",") if variant.strip()]
+        counts = export_database(args.input_root, args.output, variants, args.colors_dir, args.decimals)
+        for variant, polygons in counts.items():
+            print(f"{variant}: {polygons:,} polygons")
+        print(f"Database written to {args.output} ({Path(args.output).stat().st_size:,} bytes)")
+    elif args.command == "point":
+        with ZoneDatabase(args.database) as database:
+            zones = database.zones_at(args.lat, args.lon, args.variant)
+            if not zones:
+                print("No zone at this point")
+            for zone in zones:
+                print(json.dumps(database.zone_info(zone)))
+    else:
+        with ZoneDatabase(args.database) as database:
+            polygons = database.polygons_in_bbox(args.min_lon, args.min_lat, args.max_lon, args.max_lat,
+                                                 args.variant, geometry=False)
+            for polygon in polygons:
+                print(f"polygon {polygon['id']}: zone {polygon['zone']}, bbox {polygon['bbox']}")
+            print(f"{len(polygons)} polygons")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Geometric delta patches between two builds of the zone files.
+
+`diff` compares two build directories (e.g. two copies of public/geojson)
+ring by ring. Rings are matched by a hash fingerprint; rings that changed
+are aligned against the most similar old ring and encoded as runs of copied
+and literal vertices. The result is a directory of compact patch files plus
+a version manifest. `apply` rebuilds the new build from the old one and the
+patch, verifying content hashes along the way.
+
+Ring encodings in a patch:
+  ["=", k]          identical to old ring k
+  ["~", k, ops]     old ring k edited; ops are [start, length] copies from the
+                    old ring or [[x, y], ...] literal vertex runs
+  ["+", ring]       new literal ring
+"""
+
+import argparse
+import difflib
+import gzip
+import hashlib
+import json
+import os
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from precompress_assets import is_hashed_copy
+
+
+# Rings sharing fewer than this fraction of vertices with any old ring are sent literally
+MIN_SHARED_FRACTION = 0.3
+
+
+def sha256_bytes(data):
+    """Hex SHA-256 of a bytes object."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def ring_fingerprint(ring):
+    """Hash fingerprint of a ring's vertex sequence."""
+    return hashlib.blake2b(json.dumps(ring, separators=(',', ':')).encode(), digest_size=16).digest()
+
+
+def build_version(hashes):
+    """Content-addressed version id of a build from its {path: sha256} map."""
+    listing = "\n".join(f"{path} {digest}" for path, digest in sorted(hashes.items()))
+    return sha256_bytes(listing.encode())[:12]
+
+
+def scan_build(build_dir):
+    """Return {relative path: sha256} for every GeoJSON file in a build.
+
+    Content-hashed copies from precompress_assets.py --hashed-copies are
+    skipped; they are derived from the files they copy.
+    """
+    build_dir = Path(build_dir)
+    return {
+        path.relative_to(build_dir).as_posix(): sha256_bytes(path.read_bytes())
+        for path in sorted(build_dir.rglob("*.geojson"))
+        if not is_hashed_copy(path)
+    }
+
+
+def serialize(geojson, layout):
+    """Serialize a GeoJSON document in one of the layouts the pipeline writes."""
+    if layout == "indent":
+        return json.dumps(geojson, indent=2)
+    return json.dumps(geojson, separators=(',', ':'))
+
+
+def detect_layout(geojson, raw):
+    """Return the layout that reproduces raw exactly, or None."""
+    for layout in ("compact", "indent"):
+        if serialize(geojson, layout).encode() == raw:
+            return layout
+    return None
+
+
+def geometry_polygons(geometry):
+    """Return a geometry's coordinates as a list of polygons."""
+    if not geometry:
+        return []
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    return []
+
+
+def polygons_to_coordinates(geometry_type, polygons):
+    """Inverse of geometry_polygons."""
+    if geometry_type == "Polygon":
+        return polygons[0] if polygons else []
+    return polygons
+
+
+def flatten_rings(geojson):
+    """Return every ring of every feature in document order."""
+    return [ring for feature in geojson["features"]
+            for polygon in geometry_polygons(feature.get("geometry"))
+            for ring in polygon]
+
+
+class RingMatcher:
+    """Index of old rings by fingerprint and by vertex for alignment."""
+
+    def __init__(self, old_rings):
+        self.old_rings = old_rings
+        self.by_fingerprint = {}
+        self.by_vertex = defaultdict(set)
+
+        for index, ring in enumerate(old_rings):
+            self.by_fingerprint.setdefault(ring_fingerprint(ring), index)
+            for vertex in ring:
+                self.by_vertex[tuple(vertex)].add(index)
+
+    def best_base(self, ring):
+        """Return the index of the old ring sharing the most vertices with ring, or None."""
+        votes = Counter()
+        for vertex in ring:
+            votes.update(self.by_vertex.get(tuple(vertex), ()))
+        if not votes:
+            return None
+
+        index, shared = votes.most_common(1)[0]
+        if shared < MIN_SHARED_FRACTION * len(ring):
+            return None
+        return index
+
+    def encode(self, ring):
+        """Encode a new ring against the old rings."""
+        index = self.by_fingerprint.get(ring_fingerprint(ring))
+        if index is not None:
+            return ["=", index]
+
+        index = self.best_base(ring)
+        if index is None:
+            return ["+", ring]
+
+        old = [tuple(vertex) for vertex in self.old_rings[index]]
+        new = [tuple(vertex) for vertex in ring]
+        matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+
+        ops = []
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                ops.append([i1, i2 - i1])
+            elif tag in ("replace", "insert"):
+                if ops and isinstance(ops[-1][0], list):
+                    ops[-1].extend(ring[j1:j2])
+                else:
+                    ops.append(ring[j1:j2])
+
+        return ["~", index, ops]
+
+
+def decode_ring(encoded, old_rings):
+    """Rebuild a ring from its encoding."""
+    kind = encoded[0]
+    if kind == "=":
+        return old_rings[encoded[1]]
+    if kind == "+":
+        return encoded[1]
+
+    old = old_rings[encoded[1]]
+    ring = []
+    for op in encoded[2]:
+        if op and isinstance(op[0], list):
+            ring.extend(op)
+        else:
+            start, length = op
+            ring.extend(old[start:start + length])
+    return ring
+
+
+def diff_documents(old_geojson, new_geojson):
+    """Encode new_geojson as a patch against old_geojson."""
+    matcher = RingMatcher(flatten_rings(old_geojson))
+
+    features = []
+    for feature in new_geojson["features"]:
+        patched = dict(feature)
+        geometry = feature.get("geometry")
+        if geometry and geometry["type"] in ("Polygon", "MultiPolygon"):
+            patched["geometry"] = {
+                "type": geometry["type"],
+                "rings": [[matcher.encode(ring) for ring in polygon]
+                          for polygon in geometry_polygons(geometry)],
+            }
+        features.append(patched)
+
+    return dict(new_geojson, features=features)
+
+
+def apply_document(old_geojson, patch_document):
+    """Rebuild a GeoJSON document from the old document and its patch."""
+    old_rings = flatten_rings(old_geojson)
+
+    features = []
+    for feature in patch_document["features"]:
+        rebuilt = dict(feature)
+        geometry = feature.get("geometry")
+        if geometry and "rings" in geometry:
+            polygons = [[decode_ring(encoded, old_rings) for encoded in polygon]
+                        for polygon in geometry["rings"]]
+            rebuilt["geometry"] = {
+                "type": geometry["type"],
+                "coordinates": polygons_to_coordinates(geometry["type"], polygons),
+            }
+        features.append(rebuilt)
+
+    return dict(patch_document, features=features)
+
+
+def write_patch(path, patch):
+    """Write a gzip-compressed compact JSON patch file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = json.dumps(patch, separators=(',', ':')).encode()
+    # Fixed mtime keeps patch bytes reproducible between runs
+    with open(path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=9, mtime=0) as f:
+        f.write(data)
+
+
+def read_patch(path):
+    """Read a patch file written by write_patch."""
+    with gzip.open(path, 'rt') as f:
+        return json.load(f)
+
+
+def make_file_patch(old_path, new_path):
+    """Build the patch for one changed file, falling back to full content."""
+    old_raw = old_path.read_bytes() if old_path else None
+    new_raw = new_path.read_bytes()
+    new_geojson = json.loads(new_raw)
+
+    layout = detect_layout(new_geojson, new_raw)
+    if old_raw is not None and layout is not None:
+        old_geojson = json.loads(old_raw)
+        document = diff_documents(old_geojson, new_geojson)
+
+        # Only ship the delta if it reproduces the new file exactly
+        rebuilt = serialize(apply_document(old_geojson, document), layout).encode()
+        if rebuilt == new_raw:
+            return {"mode": "delta", "layout": layout, "document": document}
+
+    return {"mode": "full", "content": new_raw.decode()}
+
+
+def diff_builds(old_dir, new_dir, patch_dir, from_label=None, to_label=None):
+    """Compare two builds and write patch files plus a version manifest."""
+    old_dir = Path(old_dir)
+    new_dir = Path(new_dir)
+    patch_dir = Path(patch_dir)
+    patch_dir.mkdir(parents=True, exist_ok=True)
+
+    old_hashes = scan_build(old_dir)
+    new_hashes = scan_build(new_dir)
+
+    manifest = {
+        "from_version": from_label or build_version(old_hashes),
+        "to_version": to_label or build_version(new_hashes),
+        "from": old_hashes,
+        "to": {path: {"sha256": digest, "bytes": (new_dir / path).stat().st_size}
+               for path, digest in new_hashes.items()},
+        "unchanged": [],
+        "patches": {},
+        "removed": sorted(set(old_hashes) - set(new_hashes)),
+    }
+
+    total_new = 0
+    total_patch = 0
+
+    for path, digest in new_hashes.items():
+        total_new += manifest["to"][path]["bytes"]
+
+        if old_hashes.get(path) == digest:
+            manifest["unchanged"].append(path)
+            continue
+
+        old_path = old_dir / path if path in old_hashes else None
+        patch = make_file_patch(old_path, new_dir / path)
+        patch_file = f"files/{path}.patch.json.gz"
+        write_patch(patch_dir / patch_file, patch)
+
+        patch_bytes = (patch_dir / patch_file).stat().st_size
+        total_patch += patch_bytes
+        manifest["patches"][path] = {"file": patch_file, "mode": patch["mode"], "bytes": patch_bytes}
+
+        print(f"Patched {path}: {manifest['to'][path]['bytes']:,} -> {patch_bytes:,} bytes ({patch['mode']})")
+
+    with open(patch_dir / "manifest.json", 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"\n{manifest['from_version']} -> {manifest['to_version']}: "
+          f"{len(manifest['unchanged'])} unchanged, {len(manifest['patches'])} patched, "
+          f"{len(manifest['removed'])} removed")
+    print(f"Transfer: {total_patch:,} bytes of patches vs {total_new:,} bytes for the full build")
+    return manifest
+
+
+def apply_patches(base_dir, patch_dir, output_dir):
+    """Rebuild the new build from the base build and a patch directory."""
+    base_dir = Path(base_dir)
+    patch_dir = Path(patch_dir)
+    output_dir = Path(output_dir)
+
+    with open(patch_dir / "manifest.json", 'r') as f:
+        manifest = json.load(f)
+
+    for path, expected in manifest["from"].items():
+        if path in manifest["removed"]:
+            continue
+        base_path = base_dir / path
+        if not base_path.exists() or sha256_bytes(base_path.read_bytes()) != expected:
+            raise ValueError(f"Base build does not match version {manifest['from_version']}: {path}")
+
+    in_place = output_dir.resolve() == base_dir.resolve()
+
+    # Stage every file next to its target and only move them into place once
+    # all of them match, so a failure never leaves a mix of old and new files
+    staged = []
+    try:
+        for path, target in manifest["to"].items():
+            if in_place and path not in manifest["patches"]:
+                continue
+            output_path = output_dir / path
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+
+            if path in manifest["patches"]:
+                patch = read_patch(patch_dir / manifest["patches"][path]["file"])
+                if patch["mode"] == "full":
+                    content = patch["content"].encode()
+                else:
+                    with open(base_dir / path, 'r') as f:
+                        old_geojson = json.load(f)
+                    content = serialize(apply_document(old_geojson, patch["document"]), patch["layout"]).encode()
+            else:
+                content = (base_dir / path).read_bytes()
+
+            if sha256_bytes(content) != target["sha256"]:
+                raise ValueError(f"Patched {path} does not match version {manifest['to_version']}")
+
+            temp_path = output_path.with_name(output_path.name + ".tmp")
+            staged.append((temp_path, output_path))
+            temp_path.write_bytes(content)
+    except BaseException:
+        for temp_path, _ in staged:
+            temp_path.unlink(missing_ok=True)
+        raise
+
+    for temp_path, output_path in staged:
+        os.replace(temp_path, output_path)
+
+    # Drop files removed in the new version when patching in place
+    if in_place:
+        for path in manifest["removed"]:
+            (output_dir / path).unlink(missing_ok=True)
+
+    print(f"Applied {manifest['from_version']} -> {manifest['to_version']}: "
+          f"{len(manifest['patches'])} files patched into {output_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff and patch zone file builds.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    diff_parser = subparsers.add_parser("diff", help="Create patches from an old build to a new build")
+    diff_parser.add_argument("old_dir")
+    diff_parser.add_argument("new_dir")
+    diff_parser.add_argument("patch_dir")
+    diff_parser.add_argument("--from-version", default=None, help="Label for the old build (default: content hash)")
+    diff_parser.add_argument("--to-version", default=None, help="Label for the new build (default: content hash)")
+
+    apply_parser = subparsers.add_parser("apply", help="Apply patches to an old build")
+    apply_parser.add_argument("base_dir")
+    apply_parser.add_argument("patch_dir")
+    apply_parser.add_argument("output_dir", nargs="?", default=None,
+                              help="Where to write the new build (default: patch base_dir in place)")
+
+    args = parser.parse_args()
+
+    if args.command == "diff":
+        diff_builds(args.old_dir, args.new_dir, args.patch_dir, args.from_version, args.to_version)
+    else:
+        apply_patches(args.base_dir, args.patch_dir, args.output_dir or args.base_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Single-pass reader for KML Placemarks.
+
+The sequential converters look up each part of a Placemark with its own
+descendant search: SimpleData, the inline Style and its LineStyle/PolyStyle,
+MultiGeometry or Polygon, then the outer and inner boundaries of every
+polygon. Each search walks the whole subtree again. PlacemarkReader visits the
+subtree once and dispatches on tag, collecting data, style and ring
+coordinates in the same walk. Coordinates are only parsed when the geometry
+is requested, so duplicate zones can be skipped cheaply.
+
+Shared styles referenced by styleUrl (document-level Style and StyleMap
+elements) are resolved once per URL through a StyleCache. An inline Style
+still takes precedence, so output matches extract_style_info for Placemarks
+that carry one.
+"""
+
+from convert_kml_to_geojson import parse_coordinates
+from convert_kml_with_colors import kml_color_to_hex
+
+
+KML = '{http://www.opengis.net/kml/2.2}'
+
+PLACEMARK = KML + 'Placemark'
+STYLE = KML + 'Style'
+STYLE_MAP = KML + 'StyleMap'
+
+
+def parse_style(style_elem):
+    """Style info of a Style element, with the same keys as extract_style_info."""
+    line_style = None
+    poly_style = None
+    for elem in style_elem.iter():
+        if elem.tag == KML + 'LineStyle' and line_style is None:
+            line_style = elem
+        elif elem.tag == KML + 'PolyStyle' and poly_style is None:
+            poly_style = elem
+
+    style_info = {}
+    if line_style is not None:
+        line_color = line_style.find(KML + 'color')
+        if line_color is not None:
+            style_info['line_color'] = kml_color_to_hex(line_color.text)
+
+    if poly_style is not None:
+        poly_color = poly_style.find(KML + 'color')
+        if poly_color is not None:
+            style_info['fill_color'] = kml_color_to_hex(poly_color.text)
+
+        fill_elem = poly_style.find(KML + 'fill')
+        if fill_elem is not None:
+            style_info['fill'] = fill_elem.text == '1'
+
+    return style_info
+
+
+class StyleCache:
+    """Shared styles of a KML document, resolved once per styleUrl.
+
+    styles maps a Style id to its style info; style_maps maps a StyleMap id to
+    the styleUrl (or parsed inline style) of its "normal" pair.
+    """
+
+    def __init__(self, styles=None, style_maps=None):
+        self.styles = dict(styles or {})
+        self.style_maps = dict(style_maps or {})
+        self._resolved = {}
+
+    def add(self, elem):
+        """Register a document-level Style or StyleMap element with an id."""
+        style_id = elem.get('id')
+        if not style_id:
+            return
+
+        if elem.tag == STYLE:
+            self.styles[style_id] = parse_style(elem)
+        elif elem.tag == STYLE_MAP:
+            for pair in elem.findall(KML + 'Pair'):
+                key = pair.find(KML + 'key')
+                if key is not None and (key.text or '').strip() != 'normal':
+                    continue
+                url = pair.find(KML + 'styleUrl')
+                inline = pair.find(KML + 'Style')
+                if url is not None:
+                    self.style_maps[style_id] = (url.text or '').strip()
+                elif inline is not None:
+                    self.style_maps[style_id] = parse_style(inline)
+                break
+
+    @classmethod
+    def from_root(cls, root):
+        """Collect shared styles from a parsed document without entering Placemarks."""
+        cache = cls()
+        stack = [root]
+        while stack:
+            for child in stack.pop():
+                if child.tag in (STYLE, STYLE_MAP):
+                    cache.add(child)
+                elif child.tag != PLACEMARK:
+                    stack.append(child)
+        return cache
+
+    def resolve(self, url):
+        """Style info for a styleUrl, or an empty dict if it is not a known local style."""
+        if url in self._resolved:
+            return self._resolved[url]
+
+        style_info = {}
+        seen = set()
+        target = url
+        # Follow StyleMap -> Style references; only local "#id" URLs are supported
+        while isinstance(target, str) and target.startswith('#') and target not in seen:
+            seen.add(target)
+            style_id = target[1:]
+            if style_id in self.styles:
+                style_info = self.styles[style_id]
+                break
+            target = self.style_maps.get(style_id)
+        else:
+            if isinstance(target, dict):
+                style_info = target
+
+        self._resolved[url] = style_info
+        return style_info
+
+
+class PlacemarkRecord:
+    """Everything the converters need from one Placemark, collected in a single walk."""
+
+    def __init__(self):
+        self.zone_data = {}
+        self.style_info = None
+        self.style_url = None
+        # Rings of each polygon as raw coordinate strings, outer ring first
+        self.multi_polygons = None
+        self.polygon = None
+
+    def geometry(self):
+        """GeoJSON geometry, as parse_multigeometry/parse_polygon would build it."""
+        if self.multi_polygons is not None:
+            if len(self.multi_polygons) == 1:
+                return _polygon_geometry(self.multi_polygons[0])
+            return {
+                "type": "MultiPolygon",
+                "coordinates": [[parse_coordinates(text) for text in rings] for rings in self.multi_polygons]
+            }
+        if self.polygon is not None:
+            return _polygon_geometry(self.polygon)
+        return None
+
+
+def _polygon_geometry(rings):
+    return {
+        "type": "Polygon",
+        "coordinates": [parse_coordinates(text) for text in rings]
+    }
+
+
+class PlacemarkReader:
+    """Read Placemark elements with one visit per subtree.
+
+    Pass a StyleCache to collect style info; without one, styles are skipped.
+    """
+
+    def __init__(self, styles=None):
+        self.styles = styles
+        self._handlers = {
+            KML + 'SimpleData': self._simple_data,
+            KML + 'MultiGeometry': self._multi_geometry,
+            KML + 'Polygon': self._polygon,
+        }
+        if styles is not None:
+            self._handlers[STYLE] = self._style
+            self._handlers[KML + 'styleUrl'] = self._style_url
+
+    def read(self, placemark):
+        """Return the PlacemarkRecord of a Placemark element."""
+        record = PlacemarkRecord()
+        self._visit(placemark, record, None)
+
+        if self.styles is not None:
+            if record.style_info is None:
+                # No inline Style: fall back to the shared style it references
+                record.style_info = dict(self.styles.resolve(record.style_url)) if record.style_url else {}
+        else:
+            record.style_info = {}
+        return record
+
+    def _visit(self, elem, record, multi):
+        handlers = self._handlers
+        for child in elem:
+            handler = handlers.get(child.tag)
+            if handler is not None:
+                handler(child, record, multi)
+            elif len(child):
+                self._visit(child, record, multi)
+
+    def _simple_data(self, elem, record, multi):
+        record.zone_data[elem.get('name')] = elem.text
+
+    def _style(self, elem, record, multi):
+        # The first Style in the Placemark wins, as with find('.//kml:Style')
+        if record.style_info is None:
+            record.style_info = parse_style(elem)
+
+    def _style_url(self, elem, record, multi):
+        if record.style_url is None:
+            record.style_url = (elem.text or '').strip()
+
+    def _multi_geometry(self, elem, record, multi):
+        # Polygons of the first MultiGeometry, including nested ones, make up the geometry
+        if multi is None and record.multi_polygons is None:
+            record.multi_polygons = multi = []
+        self._visit(elem, record, multi)
+
+    def _polygon(self, elem, record, multi):
+        outer = None
+        inner = []
+        for boundary in elem:
+            is_outer = boundary.tag == KML + 'outerBoundaryIs'
+            if not is_outer and boundary.tag != KML + 'innerBoundaryIs':
+                continue
+
+            for ring in boundary:
+                if ring.tag != KML + 'LinearRing':
+                    continue
+                for coordinates in ring:
+                    if coordinates.tag != KML + 'coordinates':
+                        continue
+                    if not is_outer:
+                        inner.append(coordinates.text)
+                    elif outer is None:
+                        # Only the first outer boundary counts, as with find()
+                        outer = coordinates.text
+
+        polygon = ([outer] if outer is not None else []) + inner
+        if multi is not None:
+            multi.append(polygon)
+        if record.polygon is None:
+            record.polygon = polygon
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Compute label points for every significant polygon of every zone.
+
+Each label is the pole of inaccessibility of the polygon: the interior point
+farthest from its boundary, found with the polylabel cell-refinement search.
+Square cells are kept in a priority queue ordered by the best distance any
+point inside them could reach; the most promising cells are split into
+quadrants until no cell can beat the best point by more than the precision.
+Distances from a batch of cell centers to every edge are evaluated at once
+with NumPy.
+
+The search runs in Web Mercator meters, so labels sit at the visual center
+on the map. Labels are written to a sidecar FeatureCollection of points,
+<root>/labels/<variant>.geojson, which the frontend can place directly.
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+
+from zone_geometry import ZONE_ORDER
+
+
+EARTH_RADIUS = 6378137.0
+
+# Bound on points x edges evaluated in one distance batch
+MAX_BATCH_ELEMENTS = 4_000_000
+
+
+def to_mercator(ring):
+    """Project a ring of [lon, lat] pairs to Web Mercator meters."""
+    points = np.asarray(ring, dtype=np.float64)[:, :2]
+    x = np.radians(points[:, 0]) * EARTH_RADIUS
+    y = np.log(np.tan(math.pi / 4 + np.radians(points[:, 1]) / 2)) * EARTH_RADIUS
+    return np.column_stack([x, y])
+
+
+def from_mercator(x, y):
+    """Inverse of to_mercator for one point; returns (lon, lat)."""
+    return math.degrees(x / EARTH_RADIUS), math.degrees(2 * math.atan(math.exp(y / EARTH_RADIUS)) - math.pi / 2)
+
+
+def signed_distances(xs, ys, edges):
+    """Distance from each point to the polygon boundary, positive inside and negative outside."""
+    ax, ay, bx, by = edges
+    px = xs[:, None]
+    py = ys[:, None]
+
+    dx = bx - ax
+    dy = by - ay
+    length_sq = dx * dx + dy * dy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(length_sq > 0, np.clip(((px - ax) * dx + (py - ay) * dy) / length_sq, 0.0, 1.0), 0.0)
+        distance = np.hypot(ax + t * dx - px, ay + t * dy - py).min(axis=1)
+
+        # Even-odd ray cast over all rings, so holes count as outside
+        crossings = ((ay > py) != (by > py)) & (px < dx * (py - ay) / dy + ax)
+    inside = crossings.sum(axis=1) % 2 == 1
+    return np.where(inside, distance, -distance)
+
+
+def ring_centroid(ring):
+    """Area centroid of a projected ring, or its first point when degenerate."""
+    x1, y1 = ring[:-1, 0], ring[:-1, 1]
+    x2, y2 = ring[1:, 0], ring[1:, 1]
+    cross = x1 * y2 - x2 * y1
+    area = cross.sum()
+    if area == 0:
+        return ring[0, 0], ring[0, 1]
+    return ((x1 + x2) * cross).sum() / (3 * area), ((y1 + y2) * cross).sum() / (3 * area)
+
+
+def polylabel(rings, precision=500.0):
+    """Pole of inaccessibility of a projected polygon (outer ring first, then holes).
+
+    Returns (x, y, distance) where distance is the radius of the largest
+    inscribed circle found, within precision of the true optimum.
+    """
+    outer = rings[0]
+    min_x, min_y = outer.min(axis=0)
+    max_x, max_y = outer.max(axis=0)
+    cell_size = min(max_x - min_x, max_y - min_y)
+    if cell_size == 0:
+        return outer[0, 0], outer[0, 1], 0.0
+
+    starts = np.concatenate([ring[:-1] for ring in rings])
+    ends = np.concatenate([ring[1:] for ring in rings])
+    edges = (starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1])
+    batch_cells = max(1, MAX_BATCH_ELEMENTS // (4 * len(edges[0])))
+
+    heap = []
+    counter = 0
+
+    def push_cells(xs, ys, half):
+        nonlocal counter
+        distances = np.concatenate([signed_distances(xs[i:i + 4 * batch_cells], ys[i:i + 4 * batch_cells], edges)
+                                    for i in range(0, len(xs), 4 * batch_cells)])
+        # Best distance any point of a cell could reach
+        potentials = distances + half * math.sqrt(2)
+        for x, y, distance, potential in zip(xs, ys, distances, potentials):
+            heapq.heappush(heap, (-potential, counter, x, y, half, distance))
+            counter += 1
+        return distances
+
+    # Cover the bounding box with square cells
+    half = cell_size / 2
+    xs, ys = np.meshgrid(np.arange(min_x, max_x, cell_size) + half, np.arange(min_y, max_y, cell_size) + half)
+    distances = push_cells(xs.ravel(), ys.ravel(), half)
+    best_index = int(np.argmax(distances))
+    best = (xs.ravel()[best_index], ys.ravel()[best_index], distances[best_index])
+
+    # The centroid is often a good first guess; so is the bbox center for thin shapes
+    for x, y in (ring_centroid(outer), ((min_x + max_x) / 2, (min_y + max_y) / 2)):
+        distance = signed_distances(np.array([x]), np.array([y]), edges)[0]
+        if distance > best[2]:
+            best = (x, y, distance)
+
+    while heap and -heap[0][0] > best[2] + precision:
+        # Split the most promising cells together so their children share one distance batch
+        cells = []
+        while heap and len(cells) < batch_cells and -heap[0][0] > best[2] + precision:
+            cells.append(heapq.heappop(heap))
+
+        child_x = []
+        child_y = []
+        for _, _, x, y, half, _ in cells:
+            quarter = half / 2
+            child_x += [x - quarter, x + quarter, x - quarter, x + quarter]
+            child_y += [y - quarter, y - quarter, y + quarter, y + quarter]
+        child_x = np.array(child_x)
+        child_y = np.array(child_y)
+
+        # Cells popped together may differ in size, so push children per parent size
+        distances = np.empty(len(child_x))
+        for size in {cell[4] for cell in cells}:
+            mask = np.repeat(np.array([cell[4] == size for cell in cells]), 4)
+            distances[mask] = push_cells(child_x[mask], child_y[mask], size / 2)
+
+        best_index = int(np.argmax(distances))
+        if distances[best_index] > best[2]:
+            best = (child_x[best_index], child_y[best_index], distances[best_index])
+
+    return best
+
+
+def polygon_area_km2(rings, latitude):
+    """Area of a projected polygon in km², corrected for Mercator scale at latitude."""
+    area = 0.0
+    for index, ring in enumerate(rings):
+        x1, y1 = ring[:-1, 0], ring[:-1, 1]
+        x2, y2 = ring[1:, 0], ring[1:, 1]
+        ring_area = abs((x1 * y2 - x2 * y1).sum()) / 2
+        area += ring_area if index == 0 else -ring_area
+    return area * math.cos(math.radians(latitude)) ** 2 / 1e6
+
+
+def zone_labels(geojson, zone, min_area_km2=100.0, precision=500.0):
+    """Label point features for the polygons of a zone FeatureCollection."""
+    labels = []
+    for feature_index, feature in enumerate(geojson["features"]):
+        geometry = feature.get("geometry")
+        if not geometry:
+            continue
+        polygons = [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+        properties = feature.get("properties", {})
+
+        for polygon_index, polygon in enumerate(polygons):
+            rings = [to_mercator(ring) for ring in polygon if len(ring) >= 4]
+            if not rings:
+                continue
+
+            center_lat = from_mercator(0, rings[0][:, 1].mean())[1]
+            area = polygon_area_km2(rings, center_lat)
+            if area < min_area_km2:
+                continue
+
+            x, y, distance = polylabel(rings, precision)
+            lon, lat = from_mercator(x, y)
+            labels.append({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [round(lon, 5), round(lat, 5)]},
+                "properties": {
+                    "zone": zone,
+                    "title": properties.get("title"),
+                    "feature": feature_index,
+                    "polygon": polygon_index,
+                    "area_km2": round(area, 1),
+                    # Radius of the largest empty circle, for sizing the label
+                    "radius_km": round(distance * math.cos(math.radians(lat)) / 1000, 2),
+                },
+            })
+
+    # Largest polygons first, so clients can label the biggest piece of each zone
+    labels.sort(key=lambda label: -label["properties"]["area_km2"])
+    return labels
+
+
+def write_labels(root, variant, labels):
+    """Write the label sidecar of a variant atomically."""
+    output_dir = Path(root) / "labels"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"{variant}.geojson"
+
+    rank = {zone: i for i, zone in enumerate(ZONE_ORDER)}
+    labels = sorted(labels, key=lambda label: (rank.get(label["properties"]["zone"], len(rank)),
+                                               -label["properties"]["area_km2"]))
+    temp_path = output_path.with_name(output_path.name + ".tmp")
+    with open(temp_path, 'w') as f:
+        json.dump({"type": "FeatureCollection", "features": labels}, f, separators=(',', ':'))
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute pole-of-inaccessibility label points for zone polygons.")
+    parser.add_argument("--root", default="../public/geojson")
+    parser.add_argument("--variants", default="original,simplified,balanced,ultra")
+    parser.add_argument("--min-area", type=float, default=100.0, help="Smallest polygon to label, in km² (default: 100)")
+    parser.add_argument("--precision", type=float, default=500.0, help="Search precision in meters (default: 500)")
+    args = parser.parse_args()
+
+    for variant in [variant.strip() for variant in args.variants.split(",") if variant.strip()]:
+        variant_dir = Path(args.root) / variant
+        if not variant_dir.is_dir():
+            print(f"Skipping {variant}: {variant_dir} not found")
+            continue
+
+        labels = []
+        for zone in ZONE_ORDER:
+            path = variant_dir / f"zone_{zone}.geojson"
+            if not path.exists():
+                continue
+            with open(path, 'r') as f:
+                labels += zone_labels(json.load(f), zone, args.min_area, args.precision)
+
+        output_path = write_labels(args.root, variant, labels)
+        print(f"{variant}: {len(labels):,} label points written to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
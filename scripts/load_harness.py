@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Replay client sessions against a local static server to compare geometry variants.
+
+Each simulated user runs in its own process and replays sessions of the
+frontend's fetch pattern:
+
+- "Show All" in ZoneList: MapComponent fetches and parses every zone file,
+  over up to six connections as a browser would per origin.
+- A ZIP lookup: ZipLookup.findZoneForPoint fetches and parses zone files
+  one after another in zone order until one contains the point.
+
+A user's connections share one token-bucket link with the bandwidth and
+round-trip time of the selected profile. Files are served from a local
+ThreadingHTTPServer, using .gz/.br siblings from precompress_assets.py
+where they exist and compressing on the fly otherwise.
+
+Parsing and point-in-polygon tests run in Python, which is slower than a
+browser; compare variants with each other rather than reading absolute
+times as browser times.
+"""
+
+import argparse
+import gzip
+import http.client
+import json
+import math
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from queue import Empty, Queue
+
+from dissolve_geojson import point_in_ring
+from precompress_assets import is_hashed_copy
+from zone_geometry import ZONE_ORDER
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Downlink bits per second and round-trip time, after the Chrome DevTools and
+# Lighthouse presets
+PROFILES = {
+    "unthrottled": (None, 0.0),
+    "cable": (5_000_000, 0.028),
+    "slow-4g": (1_600_000, 0.150),
+    "fast-3g": (1_440_000, 0.5625),
+    "slow-3g": (400_000, 2.0),
+}
+
+# Connections a browser opens per origin over HTTP/1.1
+BROWSER_CONNECTIONS = 6
+
+# City centers used as ZIP lookup targets
+SAMPLE_LOCATIONS = [
+    (47.6062, -122.3321),  # Seattle
+    (25.7617, -80.1918),   # Miami
+    (44.9778, -93.2650),   # Minneapolis
+    (39.7392, -104.9903),  # Denver
+    (33.4484, -112.0740),  # Phoenix
+    (42.3601, -71.0589),   # Boston
+    (41.8781, -87.6298),   # Chicago
+    (32.7767, -96.7970),   # Dallas
+    (33.7490, -84.3880),   # Atlanta
+    (34.0522, -118.2437),  # Los Angeles
+]
+
+CHUNK_SIZE = 16384
+
+
+class StaticHandler(SimpleHTTPRequestHandler):
+    """Static file handler with keep-alive and gzip/brotli content encoding."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = Path(self.translate_path(self.path))
+        if not path.is_file():
+            self.send_error(404)
+            return
+
+        accepted = self.headers.get("Accept-Encoding", "")
+        encoding = None
+        if "br" in accepted and brotli is not None:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+
+        body = self.server.encoded(path, encoding)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StaticServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer that caches encoded file bodies in memory."""
+
+    daemon_threads = True
+
+    def __init__(self, address, root):
+        super().__init__(address, partial(StaticHandler, directory=str(root)))
+        self._bodies = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, path, encoding):
+        key = (path, encoding)
+        with self._lock:
+            body = self._bodies.get(key)
+        if body is not None:
+            return body
+
+        # Prefer pre-compressed siblings, as a static host would
+        sibling = path.with_name(path.name + {"gzip": ".gz", "br": ".br"}.get(encoding, ""))
+        if encoding and sibling.exists():
+            body = sibling.read_bytes()
+        elif encoding == "gzip":
+            body = gzip.compress(path.read_bytes(), 6)
+        elif encoding == "br":
+            body = brotli.compress(path.read_bytes(), quality=5)
+        else:
+            body = path.read_bytes()
+
+        with self._lock:
+            self._bodies[key] = body
+        return body
+
+
+def start_server(root):
+    """Serve root on an ephemeral localhost port from a background thread."""
+    server = StaticServer(("127.0.0.1", 0), root)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+class Throttle:
+    """Token-bucket downlink shared by one simulated user's connections."""
+
+    def __init__(self, bits_per_second):
+        self.bytes_per_second = bits_per_second / 8 if bits_per_second else None
+        self.available_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, size):
+        """Block until size bytes have passed through the link."""
+        if self.bytes_per_second is None:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.available_at = max(self.available_at, now) + size / self.bytes_per_second
+            wait = self.available_at - now
+        time.sleep(wait)
+
+
+class Client:
+    """One keep-alive connection of a simulated browser."""
+
+    def __init__(self, port, throttle, rtt, accept_encoding):
+        self.port = port
+        self.throttle = throttle
+        self.rtt = rtt
+        self.accept_encoding = accept_encoding
+        self.connection = None
+
+    def fetch(self, path):
+        """GET a path and return (status, decoded body, bytes on the wire)."""
+        if self.connection is None:
+            # TCP handshake
+            time.sleep(self.rtt)
+            self.connection = http.client.HTTPConnection("127.0.0.1", self.port)
+
+        time.sleep(self.rtt)
+        self.connection.request("GET", path, headers={"Accept-Encoding": self.accept_encoding})
+        response = self.connection.getresponse()
+
+        chunks = []
+        while True:
+            chunk = response.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            self.throttle.consume(len(chunk))
+            chunks.append(chunk)
+        body = b"".join(chunks)
+
+        encoding = response.getheader("Content-Encoding")
+        wire_bytes = len(body)
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "br":
+            body = brotli.decompress(body)
+        return response.status, body, wire_bytes
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+
+def is_point_in_geometry(lon, lat, geometry):
+    """Outer-ring point test, as isPointInGeometry in ZipLookup."""
+    if geometry["type"] == "Polygon":
+        return point_in_ring((lon, lat), geometry["coordinates"][0])
+    if geometry["type"] == "MultiPolygon":
+        return any(point_in_ring((lon, lat), polygon[0]) for polygon in geometry["coordinates"])
+    return False
+
+
+def load_all_zones(port, variant, zones, throttle, rtt, accept_encoding):
+    """Fetch and parse every zone over parallel connections; return timings and bytes."""
+    pending = Queue()
+    for zone in zones:
+        pending.put(zone)
+
+    totals = {"bytes": 0, "parse_seconds": 0.0, "missing": 0}
+    lock = threading.Lock()
+
+    def worker():
+        client = Client(port, throttle, rtt, accept_encoding)
+        try:
+            while True:
+                try:
+                    zone = pending.get_nowait()
+                except Empty:
+                    return
+                status, body, wire_bytes = client.fetch(f"/geojson/{variant}/zone_{zone}.geojson")
+                parse_seconds = 0.0
+                if status == 200:
+                    started = time.perf_counter()
+                    json.loads(body)
+                    parse_seconds = time.perf_counter() - started
+                with lock:
+                    totals["bytes"] += wire_bytes
+                    totals["parse_seconds"] += parse_seconds
+                    totals["missing"] += status != 200
+        finally:
+            client.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(min(BROWSER_CONNECTIONS, len(zones)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, totals["bytes"], totals["parse_seconds"], totals["missing"]
+
+
+def lookup_zone(port, variant, lat, lon, throttle, rtt, accept_encoding):
+    """Sequential zone scan; return (seconds, bytes, zones fetched, zone found)."""
+    client = Client(port, throttle, rtt, accept_encoding)
+    total_bytes = 0
+    fetched = 0
+    found = None
+
+    started = time.perf_counter()
+    try:
+        for zone in ZONE_ORDER:
+            status, body, wire_bytes = client.fetch(f"/geojson/{variant}/zone_{zone}.geojson")
+            total_bytes += wire_bytes
+            fetched += 1
+            if status != 200:
+                # ZipLookup skips zones that fail to load
+                continue
+            geojson = json.loads(body)
+            if any(is_point_in_geometry(lon, lat, feature["geometry"]) for feature in geojson["features"]):
+                found = zone
+                break
+    finally:
+        client.close()
+    return time.perf_counter() - started, total_bytes, fetched, found
+
+
+def run_user(port, variant, profile, accept_encoding, sessions, user):
+    """Replay sessions for one simulated user and return per-session metrics."""
+    bits_per_second, rtt = PROFILES[profile]
+    results = []
+    for session in range(sessions):
+        # Each session is a fresh page load with an empty cache
+        throttle = Throttle(bits_per_second)
+        load_seconds, load_bytes, parse_seconds, missing = load_all_zones(port, variant, ZONE_ORDER, throttle,
+                                                                          rtt, accept_encoding)
+
+        lat, lon = SAMPLE_LOCATIONS[(user * sessions + session) % len(SAMPLE_LOCATIONS)]
+        lookup_seconds, lookup_bytes, fetched, found = lookup_zone(port, variant, lat, lon, throttle, rtt,
+                                                                   accept_encoding)
+        results.append({
+            "load_seconds": load_seconds,
+            "load_bytes": load_bytes,
+            "parse_seconds": parse_seconds,
+            "missing_zones": missing,
+            "lookup_seconds": lookup_seconds,
+            "lookup_bytes": lookup_bytes,
+            "lookup_zones_fetched": fetched,
+            "lookup_found": found is not None,
+        })
+    return results
+
+
+def _run_user_task(args):
+    """Unpack arguments for run_user in a worker process."""
+    return run_user(*args)
+
+
+def measure_parse(variant_dir, repeats=3):
+    """JSON parse time of every zone file of a variant in isolation (best of repeats)."""
+    total_seconds = 0.0
+    total_bytes = 0
+    for path in sorted(Path(variant_dir).glob("zone_*.geojson")):
+        if is_hashed_copy(path):
+            continue
+        data = path.read_bytes()
+        total_bytes += len(data)
+        best = math.inf
+        for _ in range(repeats):
+            started = time.perf_counter()
+            json.loads(data)
+            best = min(best, time.perf_counter() - started)
+        total_seconds += best
+    return total_seconds, total_bytes
+
+
+def percentile(values, q):
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def summarize(results):
+    """Aggregate per-session metrics of one variant and profile."""
+    load = [r["load_seconds"] for r in results]
+    lookup = [r["lookup_seconds"] for r in results]
+    return {
+        "sessions": len(results),
+        "load_bytes": sum(r["load_bytes"] for r in results) / len(results),
+        "load_p50": percentile(load, 50),
+        "load_p95": percentile(load, 95),
+        "load_p99": percentile(load, 99),
+        "in_session_parse_seconds": sum(r["parse_seconds"] for r in results) / len(results),
+        "lookup_bytes": sum(r["lookup_bytes"] for r in results) / len(results),
+        "lookup_p50": percentile(lookup, 50),
+        "lookup_p95": percentile(lookup, 95),
+        "lookup_p99": percentile(lookup, 99),
+        "lookup_zones_fetched": sum(r["lookup_zones_fetched"] for r in results) / len(results),
+        "lookup_found_rate": sum(r["lookup_found"] for r in results) / len(results),
+        "missing_zones": max(r["missing_zones"] for r in results),
+    }
+
+
+def run_harness(public_dir, variants, profiles, users, sessions, accept_encoding):
+    """Replay sessions for every variant and profile and return the summary rows."""
+    server = start_server(public_dir)
+    port = server.server_address[1]
+    rows = []
+    try:
+        for variant in variants:
+            variant_dir = Path(public_dir) / "geojson" / variant
+            missing = [zone for zone in ZONE_ORDER if not (variant_dir / f"zone_{zone}.geojson").exists()]
+            if len(missing) == len(ZONE_ORDER):
+                print(f"Skipping {variant}: no zone files in {variant_dir}")
+                continue
+            if missing:
+                print(f"Note: {variant} has no files for zones {', '.join(missing)}; those requests return 404")
+            parse_seconds, raw_bytes = measure_parse(variant_dir)
+
+            for profile in profiles:
+                print(f"Replaying {variant} over {profile}: {users} users x {sessions} sessions...")
+                tasks = [(port, variant, profile, accept_encoding, sessions, user) for user in range(users)]
+                # All users start together, each in its own process
+                with ProcessPoolExecutor(max_workers=users) as executor:
+                    results = [result for user_results in executor.map(_run_user_task, tasks)
+                               for result in user_results]
+
+                row = {"variant": variant, "profile": profile, "raw_bytes": raw_bytes,
+                       "parse_seconds": parse_seconds}
+                row.update(summarize(results))
+                rows.append(row)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return rows
+
+
+def print_report(rows):
+    """Print one line per variant and profile."""
+    print()
+    print(f"{'Variant':<11} {'Profile':<12} {'Raw MB':>7} {'Wire MB':>8} {'Parse ms':>9} "
+          f"{'Load p50':>9} {'p95':>7} {'p99':>7} {'Lookup p50':>11} {'p95':>7} {'p99':>7} {'Zones':>6}")
+    for row in rows:
+        print(f"{row['variant']:<11} {row['profile']:<12} {row['raw_bytes'] / 1e6:>7.2f} "
+              f"{row['load_bytes'] / 1e6:>8.2f} {row['parse_seconds'] * 1000:>9.1f} "
+              f"{row['load_p50']:>8.2f}s {row['load_p95']:>6.2f}s {row['load_p99']:>6.2f}s "
+              f"{row['lookup_p50']:>10.2f}s {row['lookup_p95']:>6.2f}s {row['lookup_p99']:>6.2f}s "
+              f"{row['lookup_zones_fetched']:>6.1f}")
+    print()
+    print("Wire MB: bytes transferred for all zones per session. Parse ms: JSON parse of all zones in isolation.")
+    print("Load: time until every zone is fetched and parsed. Lookup: sequential ZIP zone scan; Zones: files fetched.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay frontend sessions to compare geometry variants.")
+    parser.add_argument("--public-dir", default="../public")
+    parser.add_argument("--variants", default="balanced,simplified,ultra")
+    parser.add_argument("--profiles", default="unthrottled,cable",
+                        help=f"Comma-separated bandwidth profiles: {', '.join(PROFILES)}")
+    parser.add_argument("--users", type=int, default=4, help="Concurrent simulated users")
+    parser.add_argument("--sessions", type=int, default=3, help="Sessions replayed by each user")
+    parser.add_argument("--encoding", default="gzip, deflate, br",
+                        help="Accept-Encoding sent by clients; use 'identity' for uncompressed transfers")
+    parser.add_argument("--report", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+
+    profiles = [profile.strip() for profile in args.profiles.split(",") if profile.strip()]
+    unknown = [profile for profile in profiles if profile not in PROFILES]
+    if unknown:
+        parser.error(f"Unknown profiles: {', '.join(unknown)}")
+
+    variants = [variant.strip() for variant in args.variants.split(",") if variant.strip()]
+    rows = run_harness(args.public_dir, variants, profiles, args.users, args.sessions, args.encoding)
+    print_report(rows)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(rows, f, indent=2)
+        print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Coarse-to-fine point-to-zone lookups across the geometry variants.
+
+A point is first resolved against the small ultra geometry. Each ultra ring
+carries precomputed error bounds against the most detailed ring of the same
+boundary: every fine vertex is anchored, in order around the ring, to the
+ultra edge its run of vertices was simplified into, and each edge's bound is
+the largest distance to the vertices of its run. Morphing one ring into the
+other never moves a boundary point farther from an edge than that edge's
+bound, so a point outside every edge's bound gets the same inside or outside
+answer from both rings. Only
+zones whose answer is not settled that way escalate to balanced, whose rings
+carry bounds against original in the same way, and then to original.
+
+Rings are matched through the vertices they share once rounded to the
+coarse precision. Rings that cannot be matched, such as small rings the
+simplifier dropped, mark their bounding box as uncertain instead.
+
+A zone missing from a finer variant is answered by the finest variant that
+has it, so the result equals resolving every zone against its most detailed
+geometry.
+"""
+
+import argparse
+import random
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+import numpy as np
+
+from zone_geometry import ZONE_ORDER, Grid, load_rings, rings_bbox
+from zone_lookup_service import ZoneIndex
+
+
+DEFAULT_VARIANTS = ("ultra", "balanced", "original")
+
+# Slack for floating point error in the distance comparison, in degrees
+BOUND_SLACK = 1e-9
+
+
+def coordinate_decimals(rings, max_decimals=10):
+    """Smallest number of decimals all ring coordinates are rounded to."""
+    points = np.concatenate(rings)
+    for decimals in range(max_decimals + 1):
+        scaled = points * 10 ** decimals
+        if np.all(np.abs(scaled - np.round(scaled)) < 1e-6):
+            return decimals
+    return None
+
+
+def _vertex_keys(points, decimals):
+    """Integer keys of coordinates quantized to a number of decimals."""
+    quantized = np.round(points * 10 ** decimals).astype(np.int64) + (1 << 30)
+    return (quantized[:, 0] << 31) | quantized[:, 1]
+
+
+def _segment_distances(points, starts, ends):
+    """Distance from each point to the segment between its start and end."""
+    direction = ends - starts
+    length_sq = (direction ** 2).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(length_sq > 0, ((points - starts) * direction).sum(axis=1) / length_sq, 0.0)
+    closest = starts + np.clip(t, 0.0, 1.0)[:, None] * direction
+    return np.hypot(*(points - closest).T)
+
+
+def _edge_bounds(coarse, points, offsets):
+    """Error bound of every coarse edge against a fine ring.
+
+    points are the fine ring's vertices starting at the vertex of the first
+    coarse vertex and closed again; offsets give, for every coarse vertex,
+    the non-decreasing position of the fine vertex it is anchored to. Fine
+    vertices between two anchors are compared with the coarse edge between
+    them, and each anchor with its coarse vertex, which both adjacent edges
+    share.
+    """
+    period = len(points) - 1
+    edges = len(coarse) - 1
+    offsets = np.append(offsets, period)
+
+    edge = np.clip(np.searchsorted(offsets, np.arange(period + 1), side="right") - 1, 0, edges - 1)
+    bounds = np.zeros(edges)
+    np.maximum.at(bounds, edge, _segment_distances(points, coarse[edge], coarse[edge + 1]))
+
+    anchors = np.hypot(*(points[offsets] - coarse).T)
+    bounds = np.maximum(bounds, anchors[:-1])
+    return np.maximum(bounds, anchors[1:])
+
+
+def _increasing_chain(offsets):
+    """Indices of a longest strictly increasing subsequence of offsets."""
+    tails = []
+    tail_index = []
+    previous = [-1] * len(offsets)
+    for i, offset in enumerate(offsets):
+        position = bisect_left(tails, offset)
+        if position == len(tails):
+            tails.append(offset)
+            tail_index.append(i)
+        else:
+            tails[position] = offset
+            tail_index[position] = i
+        previous[i] = tail_index[position - 1] if position else -1
+
+    chain = []
+    i = tail_index[-1] if tail_index else -1
+    while i != -1:
+        chain.append(i)
+        i = previous[i]
+    return chain[::-1]
+
+
+def _anchor_offsets(coarse, points, hits):
+    """Anchor every coarse vertex to a fine vertex, keeping the order around the ring.
+
+    hits maps coarse vertex index -> fine offsets with the same rounded
+    position. The longest consistent chain of hits is kept; the remaining
+    coarse vertices take the nearest fine vertex between their neighboring
+    anchors.
+    """
+    count = len(coarse) - 1
+    period = len(points) - 1
+
+    # Candidates ordered by coarse vertex, later offsets first, so a chain
+    # takes at most one candidate per coarse vertex
+    candidates = sorted(((j, offset) for j, offsets in hits.items() for offset in offsets if j > 0 and offset > 0),
+                        key=lambda item: (item[0], -item[1]))
+    chain = [candidates[i] for i in _increasing_chain([offset for _, offset in candidates])]
+    anchored = [(0, 0)] + chain + [(count, period)]
+
+    offsets = np.zeros(count, dtype=np.int64)
+    for (j0, o0), (j1, o1) in zip(anchored, anchored[1:]):
+        if j0 < count:
+            offsets[j0] = o0
+        low = o0
+        for j in range(j0 + 1, j1):
+            window = points[low:o1 + 1]
+            low += int(np.argmin(np.hypot(*(window - coarse[j]).T)))
+            offsets[j] = low
+    return offsets
+
+
+def edge_error_bounds(coarse_rings, fine_rings, decimals):
+    """Match coarse rings to the fine rings they were simplified from.
+
+    Returns, for every coarse ring, the error bounds of its edges (None when
+    the ring could not be matched) and the indices of fine rings left
+    without a coarse ring.
+    """
+    lengths = np.array([len(ring) - 1 for ring in fine_rings])
+    if not lengths.sum():
+        return [None] * len(coarse_rings), list(range(len(fine_rings)))
+    starts = np.concatenate([[0], np.cumsum(lengths)])
+    ring_of = np.repeat(np.arange(len(fine_rings)), lengths)
+    fine_keys = np.concatenate([_vertex_keys(ring[:-1], decimals) for ring in fine_rings])
+    order = np.argsort(fine_keys, kind="stable")
+    sorted_keys = fine_keys[order]
+
+    bounds = [None] * len(coarse_rings)
+    # Open or degenerate rings are never matched
+    available = np.array([np.array_equal(ring[0], ring[-1]) and len(ring) >= 4 for ring in fine_rings])
+    matched = np.zeros(len(fine_rings), dtype=bool)
+    for index, coarse in enumerate(coarse_rings):
+        if not np.array_equal(coarse[0], coarse[-1]) or len(coarse) < 4:
+            continue
+
+        # Fine vertices at the same rounded position as each coarse vertex
+        keys = _vertex_keys(coarse[:-1], decimals)
+        lo = np.searchsorted(sorted_keys, keys, side="left")
+        counts = np.searchsorted(sorted_keys, keys, side="right") - lo
+        vertex = np.repeat(np.arange(len(keys)), counts)
+        step = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        positions = order[lo[vertex] + step]
+        keep = available[ring_of[positions]]
+        vertex, positions = vertex[keep], positions[keep]
+        if not len(positions):
+            continue
+
+        # The fine ring sharing the most vertices
+        ring = int(np.argmax(np.bincount(ring_of[positions])))
+        keep = ring_of[positions] == ring
+        vertex, local = vertex[keep], positions[keep] - starts[ring]
+
+        # Rotate both rings to start at the first shared vertex
+        rotation, first = int(vertex[0]), int(local[0])
+        period = lengths[ring]
+        coarse = np.concatenate([np.roll(coarse[:-1], -rotation, axis=0), coarse[rotation:rotation + 1]])
+        fine = fine_rings[ring]
+        points = np.concatenate([np.roll(fine[:-1], -first, axis=0), fine[first:first + 1]])
+
+        hits = {}
+        for j, offset in zip((vertex - rotation) % len(keys), (local - first) % period):
+            hits.setdefault(int(j), []).append(int(offset))
+        edge_bounds = _edge_bounds(coarse, points, _anchor_offsets(coarse, points, hits))
+        bounds[index] = np.roll(edge_bounds, rotation)
+        available[ring] = False
+        matched[ring] = True
+
+    unmatched = [ring for ring in range(len(fine_rings)) if not matched[ring]]
+    return bounds, unmatched
+
+
+class UncertaintyIndex:
+    """Grid of the places where a coarse variant's answer may differ from a finer one.
+
+    Each entry is a box with a zone bit. Entries with a segment are uncertain
+    only within their bound of the segment; entries without one are uncertain
+    anywhere in their box.
+    """
+
+    def __init__(self, boxes, segments, bounds, zone_bits, cell_size=0.05):
+        self.empty = not len(boxes)
+        if self.empty:
+            return
+
+        self.grid = Grid((boxes[:, 0].min(), boxes[:, 1].min(), boxes[:, 2].max(), boxes[:, 3].max()), cell_size)
+        grid = self.grid
+        col1 = ZoneIndex._clamp_cells((boxes[:, 0] - grid.x0) / cell_size, grid.cols)
+        col2 = ZoneIndex._clamp_cells((boxes[:, 2] - grid.x0) / cell_size, grid.cols)
+        row1 = ZoneIndex._clamp_cells((boxes[:, 1] - grid.y0) / cell_size, grid.rows)
+        row2 = ZoneIndex._clamp_cells((boxes[:, 3] - grid.y0) / cell_size, grid.rows)
+
+        # One entry per (item, cell) pair, as in ZoneIndex
+        widths = col2 - col1 + 1
+        counts = widths * (row2 - row1 + 1)
+        item = np.repeat(np.arange(len(counts)), counts)
+        step = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        cells = (row1[item] + step // widths[item]) * grid.cols + col1[item] + step % widths[item]
+
+        order = np.argsort(cells, kind="stable")
+        item = item[order]
+        self.offsets = np.searchsorted(cells[order], np.arange(grid.rows * grid.cols + 1))
+        self.boxes = boxes[item]
+        self.segments = segments[item]
+        self.bounds = bounds[item]
+        self.zone_bits = zone_bits[item]
+
+    def uncertain_bits(self, lat, lon):
+        """Bitmask of the zones whose coarse answer cannot be trusted at a point."""
+        if self.empty:
+            return 0
+        grid = self.grid
+        col = int((lon - grid.x0) // grid.cell_size)
+        row = int((lat - grid.y0) // grid.cell_size)
+        if not (0 <= col < grid.cols and 0 <= row < grid.rows):
+            return 0
+
+        cell = row * grid.cols + col
+        start, end = self.offsets[cell], self.offsets[cell + 1]
+        if start == end:
+            return 0
+
+        boxes = self.boxes[start:end]
+        inside = (boxes[:, 0] <= lon) & (lon <= boxes[:, 2]) & (boxes[:, 1] <= lat) & (lat <= boxes[:, 3])
+        if not inside.any():
+            return 0
+
+        segments = self.segments[start:end][inside]
+        bounds = self.bounds[start:end][inside]
+        near = np.isnan(bounds)
+        has_segment = ~near
+        if has_segment.any():
+            point = np.array([[lon, lat]])
+            distance = _segment_distances(point, segments[has_segment, :2], segments[has_segment, 2:])
+            near[has_segment] = distance <= bounds[has_segment] + BOUND_SLACK
+        if not near.any():
+            return 0
+        return int(np.bitwise_or.reduce(self.zone_bits[start:end][inside][near]))
+
+
+class LookupCascade:
+    """Resolve points against the coarsest variant that settles the answer.
+
+    variants is a list of (name, zone_rings) pairs, coarsest first. Bits and
+    zone ids follow ZONE_ORDER.
+    """
+
+    def __init__(self, variants, cell_size=0.05):
+        self.names = [name for name, _ in variants]
+        self.zones = [zone for zone in ZONE_ORDER if any(rings.get(zone) for _, rings in variants)]
+        self.levels = []
+        self.queries = 0
+        self.resolved = dict.fromkeys(self.names, 0)
+        self.unmatched_rings = dict.fromkeys(self.names, 0)
+
+        for level, (name, zone_rings) in enumerate(variants):
+            index = ZoneIndex(zone_rings, cell_size)
+            # Map the index's own zone numbering onto ZONE_ORDER bits
+            zone_bits = [1 << ZONE_ORDER.index(zone) for zone in index.zones]
+            zone_mask = sum(zone_bits)
+
+            boxes, segments, bounds, item_bits = [], [], [], []
+            for zone in index.zones:
+                # Bounds are always taken against the zone's finest geometry, so a
+                # settled answer never depends on an intermediate variant being right
+                finer = next((rings[zone] for _, rings in reversed(variants[level + 1:]) if rings.get(zone)), None)
+                if finer is None:
+                    # The finest geometry of this zone: always authoritative
+                    continue
+
+                bit = 1 << ZONE_ORDER.index(zone)
+                coarse = zone_rings[zone]
+                decimals = coordinate_decimals(coarse)
+                if decimals is None:
+                    ring_bounds, unmatched = [None] * len(coarse), range(len(finer))
+                else:
+                    ring_bounds, unmatched = edge_error_bounds(coarse, finer, decimals)
+
+                for ring, edge_bounds in zip(coarse, ring_bounds):
+                    if edge_bounds is None:
+                        self._add_box(ring, bit, boxes, segments, bounds, item_bits)
+                        continue
+                    starts, ends = ring[:-1], ring[1:]
+                    segments.append(np.hstack([starts, ends]))
+                    boxes.append(np.column_stack([np.minimum(starts, ends) - edge_bounds[:, None],
+                                                  np.maximum(starts, ends) + edge_bounds[:, None]]))
+                    bounds.append(edge_bounds)
+                    item_bits.append(np.full(len(starts), bit, dtype=np.int64))
+                for ring in unmatched:
+                    self._add_box(finer[ring], bit, boxes, segments, bounds, item_bits)
+                self.unmatched_rings[name] += sum(b is None for b in ring_bounds) + len(unmatched)
+
+            if boxes:
+                uncertainty = UncertaintyIndex(np.concatenate(boxes), np.concatenate(segments),
+                                               np.concatenate(bounds), np.concatenate(item_bits), cell_size)
+            else:
+                uncertainty = UncertaintyIndex(np.empty((0, 4)), None, None, None, cell_size)
+            self.levels.append((name, index, zone_bits, zone_mask, uncertainty))
+
+    @staticmethod
+    def _add_box(ring, bit, boxes, segments, bounds, item_bits):
+        """Mark a ring's bounding box as uncertain for a zone."""
+        min_x, min_y, max_x, max_y = rings_bbox([ring])
+        boxes.append(np.array([[min_x, min_y, max_x, max_y]]))
+        segments.append(np.full((1, 4), np.nan))
+        bounds.append(np.array([np.nan]))
+        item_bits.append(np.array([bit], dtype=np.int64))
+
+    @classmethod
+    def from_root(cls, root, variants=DEFAULT_VARIANTS, cell_size=0.05):
+        """Build the cascade from <root>/<variant>/zone_*.geojson, coarsest variant first."""
+        loaded = []
+        for name in variants:
+            zone_rings = {}
+            for zone in ZONE_ORDER:
+                path = Path(root) / name / f"zone_{zone}.geojson"
+                if path.exists():
+                    zone_rings[zone] = load_rings(path)
+            if zone_rings:
+                loaded.append((name, zone_rings))
+        return cls(loaded, cell_size)
+
+    def _resolve(self, lat, lon, first_only):
+        """Bitmask of the zones containing a point, and the finest variant consulted."""
+        self.queries += 1
+        bits = 0
+        pending = sum(1 << ZONE_ORDER.index(zone) for zone in self.zones)
+        name = None
+
+        for name, index, zone_bits, zone_mask, uncertainty in self.levels:
+            local = index.zones_at(lat, lon)
+            level_bits = 0
+            while local:
+                lowest = local & -local
+                level_bits |= zone_bits[lowest.bit_length() - 1]
+                local ^= lowest
+
+            settled = pending & zone_mask & ~uncertainty.uncertain_bits(lat, lon)
+            bits |= level_bits & settled
+            pending &= ~settled
+
+            # Stop once nothing is left, or the first zone in order is already known
+            if not pending or (first_only and bits and (bits & -bits) < (pending & -pending)):
+                break
+
+        self.resolved[name] += 1
+        return bits, name
+
+    def zones_at(self, lat, lon):
+        """Bitmask of the zones containing a point, with bits in ZONE_ORDER."""
+        return self._resolve(lat, lon, False)[0]
+
+    def lookup(self, lat, lon):
+        """Zone containing a point, or None outside every zone."""
+        bits, _ = self._resolve(lat, lon, True)
+        if not bits:
+            return None
+        return ZONE_ORDER[(bits & -bits).bit_length() - 1]
+
+    def stats(self):
+        """Share of queries settled by each variant."""
+        return {
+            "queries": self.queries,
+            "resolved": dict(self.resolved),
+            "unmatched_rings": dict(self.unmatched_rings),
+        }
+
+
+def reference_lookup(indexes, lat, lon):
+    """Zone of a point with every zone resolved against its finest variant.
+
+    indexes are ZoneIndex objects, coarsest first.
+    """
+    for zone in ZONE_ORDER:
+        index = next((index for index in reversed(indexes) if zone in index.zones), None)
+        if index is not None and index.zones_at(lat, lon) >> index.zones.index(zone) & 1:
+            return zone
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coarse-to-fine zone lookups across geometry variants.")
+    parser.add_argument("lat", type=float, nargs="?")
+    parser.add_argument("lon", type=float, nargs="?")
+    parser.add_argument("--root", default="../public/geojson")
+    parser.add_argument("--variants", default=",".join(DEFAULT_VARIANTS), help="Coarsest first")
+    parser.add_argument("--cell-size", type=float, default=0.05, help="Index cell size in degrees")
+    parser.add_argument("--check", type=int, default=0,
+                        help="Compare this many random points against the finest geometry of every zone")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    variants = [variant.strip() for variant in args.variants.split(",") if variant.strip()]
+    cascade = LookupCascade.from_root(args.root, variants, args.cell_size)
+    print(f"Indexed {', '.join(cascade.names)} in {time.perf_counter() - started:.1f}s")
+    print(f"Unmatched rings: {cascade.unmatched_rings}")
+
+    if args.lat is not None and args.lon is not None:
+        bits, name = cascade._resolve(args.lat, args.lon, True)
+        zone = ZONE_ORDER[(bits & -bits).bit_length() - 1] if bits else None
+        print(f"{args.lat}, {args.lon}: {zone or 'no zone'} (settled by {name})")
+
+    if args.check:
+        indexes = [level[1] for level in cascade.levels]
+        bbox = rings_bbox([np.array([[index.grid.x0, index.grid.y0]]) for index in indexes] +
+                          [np.array([[index.grid.x0 + index.grid.cols * index.grid.cell_size,
+                                      index.grid.y0 + index.grid.rows * index.grid.cell_size]])
+                           for index in indexes])
+        rng = random.Random(args.seed)
+        points = [(rng.uniform(bbox[1], bbox[3]), rng.uniform(bbox[0], bbox[2])) for _ in range(args.check)]
+
+        started = time.perf_counter()
+        expected = [reference_lookup(indexes, lat, lon) for lat, lon in points]
+        reference_time = time.perf_counter() - started
+
+        cascade.queries = 0
+        cascade.resolved = dict.fromkeys(cascade.names, 0)
+        started = time.perf_counter()
+        actual = [cascade.lookup(lat, lon) for lat, lon in points]
+        cascade_time = time.perf_counter() - started
+
+        mismatches = sum(a != e for a, e in zip(actual, expected))
+        print(f"{args.check:,} points: {mismatches} mismatches")
+        print(f"Reference {reference_time / args.check * 1e6:.0f} us/query, "
+              f"cascade {cascade_time / args.check * 1e6:.0f} us/query")
+        for name, count in cascade.resolved.items():
+            print(f"  settled by {name}: {count / args.check:.1%}")
+
+
+if __name__ == "__main__":
+    main()
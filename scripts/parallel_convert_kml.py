@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Convert USDA Hardiness Zone KML file to individual GeoJSON files in parallel.
+
+A pre-pass memory-maps the KML file and indexes the byte offsets of every
+<Placemark> element. Worker processes then parse disjoint ranges of Placemarks
+straight from the mapped file with the single-pass PlacemarkReader, and the
+results are merged per zone. Output is the same as convert_kml_to_geojson.py
+(or convert_kml_with_colors.py with --with-colors).
+
+Shared styles referenced by styleUrl live outside the Placemarks; with
+--with-colors the pre-pass also parses the Style and StyleMap elements between
+Placemarks and hands them to the workers.
+"""
+
+import xml.etree.ElementTree as ET
+import argparse
+import json
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from kml_reader import PlacemarkReader, StyleCache
+
+
+PLACEMARK_START = b'<Placemark'
+PLACEMARK_END = b'</Placemark>'
+STYLE_START = b'<Style'
+TAG_NAME_END = (b'>', b'/', b' ', b'\t', b'\n', b'\r')
+
+
+def find_root_start_tag(buffer):
+    """Return the bytes of the root element's start tag (e.g. <kml xmlns=...>)."""
+    pos = 0
+    while True:
+        start = buffer.find(b'<', pos)
+        if start == -1:
+            raise ValueError("No root element found in KML file")
+
+        # Skip the XML declaration, comments and doctype
+        next_char = buffer[start + 1:start + 2]
+        if next_char in (b'?', b'!'):
+            pos = buffer.find(b'>', start) + 1
+            continue
+
+        end = buffer.find(b'>', start)
+        return bytes(buffer[start:end + 1])
+
+
+def build_placemark_index(buffer):
+    """Scan a KML buffer and return (start, end) byte offsets of every Placemark."""
+    index = []
+    pos = 0
+
+    while True:
+        start = buffer.find(PLACEMARK_START, pos)
+        if start == -1:
+            break
+
+        # Make sure we matched <Placemark> or <Placemark ...>, not <PlacemarkFoo>
+        next_char = buffer[start + len(PLACEMARK_START):start + len(PLACEMARK_START) + 1]
+        if next_char not in (b'>', b' ', b'\t', b'\n', b'\r'):
+            pos = start + len(PLACEMARK_START)
+            continue
+
+        end = buffer.find(PLACEMARK_END, start)
+        if end == -1:
+            raise ValueError(f"Unterminated Placemark at byte {start}")
+
+        end += len(PLACEMARK_END)
+        index.append((start, end))
+        pos = end
+
+    return index
+
+
+def build_style_cache(buffer, index, root_tag):
+    """Parse the shared Style and StyleMap elements that sit between Placemarks."""
+    cache = StyleCache()
+    gaps = zip([0] + [end for _, end in index], [start for start, _ in index] + [len(buffer)])
+    root_name = root_tag[1:].split(None, 1)[0].rstrip(b'>/')
+    closing_tag = b'</' + root_name + b'>'
+
+    for gap_start, gap_end in gaps:
+        pos = gap_start
+        while True:
+            start = buffer.find(STYLE_START, pos, gap_end)
+            if start == -1:
+                break
+
+            # Matches both <Style> and <StyleMap>; read the full tag name
+            name_end = start + 1
+            while name_end < gap_end and buffer[name_end:name_end + 1] not in TAG_NAME_END:
+                name_end += 1
+            name = bytes(buffer[start + 1:name_end])
+            if name not in (b'Style', b'StyleMap'):
+                pos = name_end
+                continue
+
+            tag_end = buffer.find(b'>', start, gap_end)
+            if tag_end == -1:
+                break
+            if buffer[tag_end - 1:tag_end] == b'/':
+                end = tag_end + 1
+            else:
+                end = buffer.find(b'</' + name + b'>', tag_end, gap_end)
+                if end == -1:
+                    raise ValueError(f"Unterminated {name.decode()} at byte {start}")
+                end += len(name) + 3
+
+            fragment = root_tag + buffer[start:end] + closing_tag
+            cache.add(ET.fromstring(fragment)[0])
+            pos = end
+
+    return cache
+
+
+def split_index(index, num_chunks):
+    """Split the Placemark index into contiguous ranges of roughly equal byte size."""
+    if not index:
+        return []
+
+    total_bytes = sum(end - start for start, end in index)
+    target = max(1, total_bytes // max(1, num_chunks))
+
+    chunks = []
+    current = []
+    current_bytes = 0
+
+    for start, end in index:
+        current.append((start, end))
+        current_bytes += end - start
+        if current_bytes >= target:
+            chunks.append(current)
+            current = []
+            current_bytes = 0
+
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+
+def placemark_to_feature(placemark, with_colors=False, reader=None):
+    """Convert a parsed Placemark element to (zone_name, feature, style_info)."""
+    if reader is None:
+        reader = PlacemarkReader(StyleCache() if with_colors else None)
+    return record_to_feature(reader.read(placemark))
+
+
+def record_to_feature(record):
+    """Convert a PlacemarkRecord to (zone_name, feature, style_info)."""
+    zone_data = record.zone_data
+
+    if not zone_data.get('zone'):
+        return None
+
+    zone_name = zone_data['zone']
+    zone_title = zone_data.get('zonetitle', zone_name)
+    geometry = record.geometry()
+
+    properties = {
+        "zone": zone_name,
+        "title": zone_title,
+        "temperature_range": zone_data.get('trange', ''),
+        "gridcode": zone_data.get('gridcode', ''),
+        "id": zone_data.get('Id', '')
+    }
+
+    style_info = record.style_info
+    if style_info:
+        properties.update(style_info)
+
+    if geometry is None:
+        return zone_name, None, style_info
+
+    feature = {
+        "type": "Feature",
+        "properties": properties,
+        "geometry": geometry
+    }
+
+    return zone_name, feature, style_info
+
+
+def parse_placemark_range(kml_file_path, root_tag, offsets, with_colors=False, styles=None):
+    """Parse a range of Placemarks from the memory-mapped KML file.
+
+    Returns a list of (offset, zone_name, feature, style_info) tuples, keeping
+    only the first Placemark of each zone within the range. styles is the
+    StyleCache of shared styles, used with with_colors.
+    """
+    reader = PlacemarkReader((styles or StyleCache()) if with_colors else None)
+    root_name = root_tag[1:].split(None, 1)[0].rstrip(b'>/')
+    closing_tag = b'</' + root_name + b'>'
+
+    results = []
+    seen_zones = set()
+
+    with open(kml_file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            for start, end in offsets:
+                # Wrap the fragment in the root tag so namespace declarations apply
+                fragment = root_tag + buffer[start:end] + closing_tag
+                placemark = ET.fromstring(fragment)[0]
+
+                record = reader.read(placemark)
+                zone_name = record.zone_data.get('zone')
+                # Skip duplicates before their coordinates are parsed
+                if not zone_name or zone_name in seen_zones:
+                    continue
+
+                seen_zones.add(zone_name)
+                results.append((start,) + record_to_feature(record))
+
+    return results
+
+
+def _parse_placemark_range_task(args):
+    """Unpack arguments for parse_placemark_range in a worker process."""
+    return parse_placemark_range(*args)
+
+
+def parallel_convert_kml_to_geojson(kml_file_path, output_dir, workers=None, with_colors=False):
+    """Convert KML file to individual GeoJSON files for each zone using worker processes."""
+
+    # Create output directory if it doesn't exist
+    Path(output_dir).mkdir(exist_ok=True)
+
+    workers = workers or os.cpu_count() or 1
+
+    # Pre-pass: index Placemark byte offsets over the memory-mapped file
+    with open(kml_file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            root_tag = find_root_start_tag(buffer)
+            index = build_placemark_index(buffer)
+            styles = build_style_cache(buffer, index, root_tag) if with_colors else None
+
+    print(f"Indexed {len(index)} Placemarks, parsing with {workers} workers...")
+
+    # Several chunks per worker keeps the pool busy when Placemark sizes vary
+    chunks = split_index(index, workers * 4)
+    tasks = [(kml_file_path, root_tag, chunk, with_colors, styles) for chunk in chunks]
+
+    if workers == 1:
+        chunk_results = map(_parse_placemark_range_task, tasks)
+        merged = [item for results in chunk_results for item in results]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunk_results = executor.map(_parse_placemark_range_task, tasks)
+            merged = [item for results in chunk_results for item in results]
+
+    # Merge per zone: the first Placemark in document order wins, as in the
+    # sequential converters
+    merged.sort(key=lambda item: item[0])
+
+    zones_processed = set()
+    all_colors = set()
+
+    for _, zone_name, feature, style_info in merged:
+        if zone_name in zones_processed:
+            continue
+
+        zones_processed.add(zone_name)
+
+        if style_info.get('line_color'):
+            all_colors.add(style_info['line_color'])
+        if style_info.get('fill_color'):
+            all_colors.add(style_info['fill_color'])
+
+        if feature is None:
+            print(f"Warning: No geometry found for zone {zone_name}")
+            continue
+
+        # Create GeoJSON FeatureCollection
+        geojson = {
+            "type": "FeatureCollection",
+            "features": [feature]
+        }
+
+        # Save to file
+        filename = f"zone_{zone_name.replace('/', '_')}.geojson"
+        output_path = os.path.join(output_dir, filename)
+
+        with open(output_path, 'w') as f:
+            json.dump(geojson, f, indent=2)
+
+        if with_colors:
+            print(f"Created: {filename} (colors: {style_info})")
+        else:
+            print(f"Created: {filename}")
+
+    print(f"\nProcessed {len(zones_processed)} unique zones")
+    if with_colors:
+        print(f"Colors found: {sorted(all_colors)}")
+    return list(zones_processed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the USDA KML file to GeoJSON using multiple processes.")
+    parser.add_argument("--kml-file", default="../data/source/phzm_us_zones_kml_2023.kml")
+    parser.add_argument("--output-dir", default=None,
+                        help="Defaults to ../data/geojson/original (or with_colors with --with-colors)")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--with-colors", action="store_true", help="Include KML style colors in properties")
+    args = parser.parse_args()
+
+    kml_file = args.kml_file
+    output_dir = args.output_dir
+    if output_dir is None:
+        output_dir = "../data/geojson/with_colors" if args.with_colors else "../data/geojson/original"
+
+    if not os.path.exists(kml_file):
+        print(f"Error: KML file not found at {kml_file}")
+        return
+
+    print("Converting KML to GeoJSON files in parallel...")
+    zones = parallel_convert_kml_to_geojson(kml_file, output_dir, args.workers, args.with_colors)
+
+    print(f"\nConversion complete! Created {len(zones)} zone files in {output_dir}")
+    print("Zones:", sorted(zones))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Pre-compress published GeoJSON files and write a content-hash manifest.
+
+Every *.geojson file under the output root gets max-level .gz and .br
+siblings, so a static server or CDN can serve them without compressing on
+each request. manifest.json records the content hash, byte sizes, an ETag
+and a content-hashed filename for every file, for immutable caching.
+
+Brotli output needs the optional `brotli` package; without it only gzip
+siblings are written and stale .br siblings are removed.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+MANIFEST_NAME = "manifest.json"
+
+
+def hashed_name(path, digest, length=10):
+    """Cache-busting filename, e.g. zone_7a.3f9c2b1a0d.geojson."""
+    path = Path(path)
+    return f"{path.stem}.{digest[:length]}{path.suffix}"
+
+
+def write_gzip(data, output_path):
+    """Write gzip level 9 output with a fixed mtime so identical input gives identical bytes."""
+    with open(output_path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=9, mtime=0) as f:
+        f.write(data)
+
+
+def compress_file(path, hashed_copies=False, previous=None):
+    """Write .gz and .br siblings for one file and return its manifest entry.
+
+    Siblings are left alone when previous (the file's entry from the last
+    manifest) shows the content has not changed and the siblings still exist.
+    Without the brotli package, any existing .br sibling is removed, since it
+    could no longer be kept in step with the file.
+    """
+    path = Path(path)
+    data = path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+
+    gz_path = path.with_name(path.name + ".gz")
+    br_path = path.with_name(path.name + ".br")
+
+    unchanged = (
+        previous is not None
+        and previous.get("sha256") == digest
+        and gz_path.exists()
+        and (brotli is None or br_path.exists())
+    )
+
+    if not unchanged:
+        write_gzip(data, gz_path)
+        if brotli is not None:
+            br_path.write_bytes(brotli.compress(data, quality=11))
+    if brotli is None and br_path.exists():
+        br_path.unlink()
+
+    entry = manifest_entry(path, digest, len(data))
+
+    if hashed_copies:
+        # Immutable copies under the content-hashed name, with their siblings
+        hashed_path = path.with_name(entry["hashed"])
+        for source, target in ((path, hashed_path),
+                               (gz_path, hashed_path.with_name(hashed_path.name + ".gz")),
+                               (br_path, hashed_path.with_name(hashed_path.name + ".br"))):
+            if source.exists() and not target.exists():
+                shutil.copyfile(source, target)
+
+    return entry
+
+
+def manifest_entry(path, digest=None, size=None):
+    """Manifest entry for a file from its content and existing siblings."""
+    path = Path(path)
+    if digest is None:
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        size = len(data)
+
+    entry = {
+        "sha256": digest,
+        "etag": f'"{digest[:32]}"',
+        "bytes": size,
+        "hashed": hashed_name(path, digest),
+    }
+
+    gz_path = path.with_name(path.name + ".gz")
+    br_path = path.with_name(path.name + ".br")
+    if gz_path.exists():
+        entry["gzip_bytes"] = gz_path.stat().st_size
+    if brotli is not None and br_path.exists():
+        entry["br_bytes"] = br_path.stat().st_size
+    return entry
+
+
+def _compress_task(args):
+    """Unpack arguments for compress_file in a worker process."""
+    return compress_file(*args)
+
+
+def load_manifest(root):
+    """Load the previous manifest of an output root, if any."""
+    manifest_path = Path(root) / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {"files": {}}
+    with open(manifest_path, 'r') as f:
+        return json.load(f)
+
+
+def is_hashed_copy(path):
+    """True for content-hashed copies such as zone_7a.3f9c2b1a0d.geojson."""
+    # Hashed copies have an extra dot-separated part
+    return len(Path(path).name.split(".")) > 2
+
+
+def source_files(root):
+    """Published GeoJSON files under root, excluding content-hashed copies."""
+    root = Path(root)
+    return [path for path in sorted(root.rglob("*.geojson")) if not is_hashed_copy(path)]
+
+
+def precompress_root(root, workers=None, hashed_copies=False):
+    """Compress every published file under root in parallel and write the manifest."""
+    root = Path(root)
+    previous = load_manifest(root)["files"]
+    files = source_files(root)
+    relative = [path.relative_to(root).as_posix() for path in files]
+
+    # Largest files first so one big zone does not finish last on its own
+    order = sorted(range(len(files)), key=lambda i: files[i].stat().st_size, reverse=True)
+    tasks = [(str(files[i]), hashed_copies, previous.get(relative[i])) for i in order]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        entries = dict(zip((relative[i] for i in order), executor.map(_compress_task, tasks)))
+
+    manifest = {
+        "algorithms": ["gzip"] + (["br"] if brotli is not None else []),
+        "files": {name: entries[name] for name in relative},
+    }
+    write_manifest(root, manifest)
+    return manifest
+
+
+def build_manifest(root):
+    """Build the manifest for root from files and siblings already on disk."""
+    root = Path(root)
+    return {
+        "algorithms": ["gzip"] + (["br"] if brotli is not None else []),
+        "files": {path.relative_to(root).as_posix(): manifest_entry(path) for path in source_files(root)},
+    }
+
+
+def write_manifest(root, manifest):
+    """Write manifest.json atomically."""
+    manifest_path = Path(root) / MANIFEST_NAME
+    temp_path = manifest_path.with_name(MANIFEST_NAME + ".tmp")
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write .gz/.br siblings and a content-hash manifest for GeoJSON files.")
+    parser.add_argument("--root", action="append", default=None,
+                        help="Output root, may be given more than once (default: ../public/geojson)")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--hashed-copies", action="store_true",
+                        help="Also write content-hashed copies for immutable cache-busting URLs")
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("Note: brotli package not installed, writing gzip siblings only")
+
+    for root in args.root or ["../public/geojson"]:
+        manifest = precompress_root(root, args.workers, args.hashed_copies)
+        files = manifest["files"].values()
+
+        total = sum(entry["bytes"] for entry in files)
+        total_gzip = sum(entry.get("gzip_bytes", 0) for entry in files)
+        print(f"{root}: {len(manifest['files'])} files, {total:,} bytes -> gzip {total_gzip:,} bytes")
+        if brotli is not None:
+            total_br = sum(entry.get("br_bytes", 0) for entry in files)
+            print(f"{root}: brotli {total_br:,} bytes")
+        print(f"Manifest written to {Path(root) / MANIFEST_NAME}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Render the zone overlay into a z/x/y pyramid of PNG raster tiles.
+
+Zone polygons are projected to Web Mercator once and rasterized per tile with
+the vectorized scanline fill from zone_geometry.py, so no map server or
+native imaging library is needed. Each tile is supersampled and averaged down
+for anti-aliased edges, then encoded as an RGBA PNG with zlib.
+
+Fill colors come from the fill_color properties that convert_kml_with_colors.py
+extracts with kml_color_to_hex. Zones without one fall back to the colors the
+frontend uses in src/lib/zoneData.ts.
+"""
+
+import argparse
+import json
+import math
+import os
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from zone_geometry import ZONE_ORDER, load_rings, rasterize_edges, ring_edges
+
+
+TILE_SIZE = 256
+
+# Latitude limit of the Web Mercator square
+MAX_LATITUDE = 85.0511287798
+
+# Same colors as src/lib/zoneData.ts
+DEFAULT_ZONE_COLORS = {
+    '3a': '#0D47A1', '3b': '#1565C0', '4a': '#1976D2', '4b': '#1E88E5',
+    '5a': '#2196F3', '5b': '#42A5F5', '6a': '#64B5F6', '6b': '#81C784',
+    '7a': '#66BB6A', '7b': '#4CAF50', '8a': '#8BC34A', '8b': '#CDDC39',
+    '9a': '#FFEB3B', '9b': '#FFC107', '10a': '#FF9800', '10b': '#FF7043',
+    '11a': '#F44336', '11b': '#E53935', '12a': '#D32F2F',
+}
+
+
+class TileGrid:
+    """Pixel grid of one tile in normalized mercator units (0..1, y growing south)."""
+
+    def __init__(self, z, x, y, size):
+        world = 2 ** z
+        self.x0 = x / world
+        self.y0 = y / world
+        self.cell_size = 1 / (world * size)
+        self.rows = size
+        self.cols = size
+
+
+def project(lon, lat):
+    """Project lon/lat arrays to normalized Web Mercator coordinates."""
+    lat = np.clip(lat, -MAX_LATITUDE, MAX_LATITUDE)
+    x = (lon + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(np.radians(lat)) + 1.0 / np.cos(np.radians(lat))) / math.pi) / 2.0
+    return x, y
+
+
+def hex_to_rgb(color):
+    """Convert #RRGGBB to an (r, g, b) tuple."""
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def load_zone_colors(colors_dir, zones):
+    """Fill color per zone from the with_colors files, falling back to the frontend palette."""
+    colors = {}
+    for zone in zones:
+        color = None
+        path = Path(colors_dir) / f"zone_{zone}.geojson" if colors_dir else None
+        if path is not None and path.exists():
+            with open(path, 'r') as f:
+                features = json.load(f)["features"]
+            color = next((feature["properties"].get("fill_color") for feature in features
+                          if feature.get("properties", {}).get("fill_color")), None)
+        colors[zone] = hex_to_rgb(color or DEFAULT_ZONE_COLORS.get(zone, '#808080'))
+    return colors
+
+
+def load_zone_edges(input_dir):
+    """Project every zone's edges to mercator, with per-edge bounds for tile culling."""
+    zones = []
+    for zone in ZONE_ORDER:
+        path = Path(input_dir) / f"zone_{zone}.geojson"
+        if not path.exists():
+            continue
+        rings = load_rings(path)
+        if not rings:
+            continue
+
+        projected = []
+        for ring in rings:
+            x, y = project(ring[:, 0], ring[:, 1])
+            projected.append(np.column_stack([x, y]))
+
+        x1, y1, x2, y2 = ring_edges(projected)
+        # Horizontal edges never cross a row center
+        keep = y1 != y2
+        x1, y1, x2, y2 = x1[keep], y1[keep], x2[keep], y2[keep]
+        zones.append({
+            "zone": zone,
+            "edges": (x1, y1, x2, y2),
+            "min_x": np.minimum(x1, x2),
+            "min_y": np.minimum(y1, y2),
+            "max_y": np.maximum(y1, y2),
+            "bbox": (min(x1.min(), x2.min()), min(y1.min(), y2.min()),
+                     max(x1.max(), x2.max()), max(y1.max(), y2.max())),
+        })
+    return zones
+
+
+def tile_range(bbox, z):
+    """Inclusive x and y tile ranges covering a normalized mercator bbox at zoom z."""
+    world = 2 ** z
+    min_x, min_y, max_x, max_y = bbox
+    clamp = lambda value: min(max(int(math.floor(value * world)), 0), world - 1)
+    return clamp(min_x), clamp(max_x), clamp(min_y), clamp(max_y)
+
+
+def render_tile(zones, colors, z, x, y, size=TILE_SIZE, supersample=2, opacity=0.7):
+    """Render one tile as an RGBA array, or None when no zone covers it."""
+    grid = TileGrid(z, x, y, size * supersample)
+    right = grid.x0 + grid.cols * grid.cell_size
+    bottom = grid.y0 + grid.rows * grid.cell_size
+
+    rgb = np.zeros((size, size, 3), dtype=np.float64)
+    alpha = np.zeros((size, size), dtype=np.float64)
+
+    for zone in zones:
+        bbox = zone["bbox"]
+        if bbox[0] >= right or bbox[2] <= grid.x0 or bbox[1] >= bottom or bbox[3] <= grid.y0:
+            continue
+
+        # Edges above, below or right of the tile never toggle a pixel inside it
+        near = (zone["max_y"] > grid.y0) & (zone["min_y"] < bottom) & (zone["min_x"] < right)
+        if not near.any():
+            continue
+        x1, y1, x2, y2 = (values[near] for values in zone["edges"])
+
+        mask = rasterize_edges(x1, y1, x2, y2, grid)
+        if not mask.any():
+            continue
+
+        # Fraction of subpixels covered gives the anti-aliased coverage
+        coverage = mask.reshape(size, supersample, size, supersample).mean(axis=(1, 3)) * opacity
+
+        # Later zones are painted over earlier ones
+        color = np.array(colors[zone["zone"]], dtype=np.float64)
+        rgb = rgb * (1 - coverage[..., None]) + color * coverage[..., None]
+        alpha = alpha * (1 - coverage) + coverage
+
+    if not alpha.any():
+        return None
+
+    # Store straight (not premultiplied) color as PNG expects
+    with np.errstate(invalid='ignore', divide='ignore'):
+        straight = np.where(alpha[..., None] > 0, rgb / alpha[..., None], 0)
+    pixels = np.dstack([straight, alpha * 255])
+    return np.clip(np.rint(pixels), 0, 255).astype(np.uint8)
+
+
+def encode_png(pixels):
+    """Encode an (h, w, 4) uint8 RGBA array as PNG bytes."""
+    height, width, _ = pixels.shape
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    # Filter type 0 (None) at the start of every scanline
+    raw = np.concatenate([np.zeros((height, 1), dtype=np.uint8), pixels.reshape(height, width * 4)], axis=1)
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(raw.tobytes(), 9)) + chunk(b'IEND', b''))
+
+
+# Geometry loaded once per worker process
+_worker_state = {}
+
+
+def _init_worker(input_dir, colors_dir, output_dir, size, supersample, opacity):
+    """Load projected zone edges and colors in a worker process."""
+    zones = load_zone_edges(input_dir)
+    _worker_state.update(
+        zones=zones,
+        colors=load_zone_colors(colors_dir, [zone["zone"] for zone in zones]),
+        output_dir=Path(output_dir),
+        size=size,
+        supersample=supersample,
+        opacity=opacity,
+    )
+
+
+def _render_tiles(tiles):
+    """Render and write a batch of tiles; return (written, empty) counts."""
+    state = _worker_state
+    written = 0
+    empty = 0
+    for z, x, y in tiles:
+        pixels = render_tile(state["zones"], state["colors"], z, x, y,
+                             state["size"], state["supersample"], state["opacity"])
+        if pixels is None:
+            empty += 1
+            continue
+
+        tile_path = state["output_dir"] / str(z) / str(x) / f"{y}.png"
+        tile_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = tile_path.with_name(tile_path.name + ".tmp")
+        temp_path.write_bytes(encode_png(pixels))
+        os.replace(temp_path, tile_path)
+        written += 1
+    return written, empty
+
+
+def render_pyramid(input_dir, output_dir, min_zoom, max_zoom, colors_dir=None, workers=None,
+                   size=TILE_SIZE, supersample=2, opacity=0.7, batch_size=32):
+    """Render every tile covering the zones from min_zoom to max_zoom and write tiles.json."""
+    zones = load_zone_edges(input_dir)
+    if not zones:
+        raise ValueError(f"No zone files found in {input_dir}")
+
+    bbox = (min(zone["bbox"][0] for zone in zones), min(zone["bbox"][1] for zone in zones),
+            max(zone["bbox"][2] for zone in zones), max(zone["bbox"][3] for zone in zones))
+
+    tiles = []
+    for z in range(min_zoom, max_zoom + 1):
+        min_tx, max_tx, min_ty, max_ty = tile_range(bbox, z)
+        tiles.extend((z, x, y) for x in range(min_tx, max_tx + 1) for y in range(min_ty, max_ty + 1))
+
+    # Deep zooms first: their batches are the slowest
+    tiles.sort(key=lambda tile: -tile[0])
+    batches = [tiles[i:i + batch_size] for i in range(0, len(tiles), batch_size)]
+
+    written = 0
+    empty = 0
+    init_args = (input_dir, colors_dir, output_dir, size, supersample, opacity)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                             initializer=_init_worker, initargs=init_args) as executor:
+        for batch_written, batch_empty in executor.map(_render_tiles, batches):
+            written += batch_written
+            empty += batch_empty
+
+    write_tilejson(output_dir, bbox, min_zoom, max_zoom, size)
+    return len(tiles), written, empty
+
+
+def write_tilejson(output_dir, bbox, min_zoom, max_zoom, size):
+    """Write tiles.json describing the pyramid for map clients."""
+    min_x, min_y, max_x, max_y = bbox
+    to_lon = lambda x: x * 360.0 - 180.0
+    to_lat = lambda y: math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+
+    tilejson = {
+        "tilejson": "2.2.0",
+        "tiles": ["{z}/{x}/{y}.png"],
+        "minzoom": min_zoom,
+        "maxzoom": max_zoom,
+        "tileSize": size,
+        "bounds": [round(to_lon(min_x), 6), round(to_lat(max_y), 6), round(to_lon(max_x), 6), round(to_lat(min_y), 6)],
+    }
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    with open(Path(output_dir) / "tiles.json", 'w') as f:
+        json.dump(tilejson, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the zone overlay into z/x/y PNG tiles.")
+    parser.add_argument("--input-dir", default="../public/geojson/balanced")
+    parser.add_argument("--colors-dir", default="../public/geojson/with_colors",
+                        help="Zone files with fill_color properties (default: ../public/geojson/with_colors)")
+    parser.add_argument("--output-dir", default="../public/tiles")
+    parser.add_argument("--min-zoom", type=int, default=3)
+    parser.add_argument("--max-zoom", type=int, default=7)
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE)
+    parser.add_argument("--supersample", type=int, default=2, help="Subpixels per pixel side for anti-aliasing")
+    parser.add_argument("--opacity", type=float, default=0.7, help="Fill opacity, as in MapComponent")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if args.min_zoom > args.max_zoom:
+        parser.error("--min-zoom must not be greater than --max-zoom")
+
+    print(f"Rendering zoom {args.min_zoom}-{args.max_zoom} tiles from {args.input_dir}...")
+    total, written, empty = render_pyramid(args.input_dir, args.output_dir, args.min_zoom, args.max_zoom,
+                                           args.colors_dir, args.workers, args.tile_size,
+                                           args.supersample, args.opacity)
+    print(f"{total:,} tiles: {written:,} written, {empty:,} empty skipped")
+    print(f"Tiles written to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+Run the full data processing pipeline as a concurrent staged scheduler.
+
+Stages form a dependency graph: convert -> simplify (all profiles) -> encode
+-> validate, with an optional label stage branching off simplify. Zones
+stream from one stage to the next through bounded queues, so a small zone can
+be fully published while a large one is still being simplified. CPU-heavy
+work runs in a shared process pool; stage threads only move items along and
+report progress.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import queue
+import sys
+import threading
+import time
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+from parallel_convert_kml import (
+    find_root_start_tag, build_placemark_index, build_style_cache, split_index, parse_placemark_range
+)
+from simplify_geojson import simplify_geometry
+from balanced_simplify_geojson import balanced_simplify_geometry, SIMPLIFIERS
+from ultra_simplify_geojson import ultra_simplify_geometry
+from dissolve_geojson import dissolve_geojson
+from label_points import zone_labels, write_labels
+from precompress_assets import compress_file, build_manifest, write_manifest
+
+
+# Marker passed down a queue when an upstream stage has finished
+_DONE = object()
+
+# Profile name -> (simplify function, settings). Settings match each script's main().
+PROFILES = {
+    "original": None,
+    "simplified": (simplify_geometry, {"coordinate_precision": 4, "tolerance": 0.0005}),
+    "balanced": (balanced_simplify_geometry, {"tolerance": 0.002, "coordinate_precision": 4}),
+    "ultra": (ultra_simplify_geometry, {"tolerance": 0.02, "coordinate_precision": 3}),
+}
+
+# With --with-colors, the colored features are published under this profile,
+# as convert_kml_with_colors.py does; every other profile is built without colors
+COLORS_PROFILE = "with_colors"
+COLOR_PROPERTIES = ("line_color", "fill_color", "fill")
+
+
+class Stage:
+    """A pipeline stage that consumes items from its upstream and emits results.
+
+    func is called once per task. fan_out turns one incoming item into a list
+    of tasks (default: the item itself). Stages without a dependency are sources
+    and func is a generator that yields items. With collect, results are also
+    kept in results for use after the run.
+    """
+
+    def __init__(self, name, func, depends_on=None, fan_out=None, workers=1, use_processes=False, collect=False):
+        self.name = name
+        self.func = func
+        self.depends_on = depends_on
+        self.fan_out = fan_out
+        self.workers = workers
+        self.use_processes = use_processes
+        self.collect = collect
+
+        self.input_queue = None
+        self.output_queues = []
+        self.completed = 0
+        self.results = []
+        self.errors = []
+        self.busy_time = 0.0
+        self.lock = threading.Lock()
+
+    def emit(self, item):
+        """Send an item to every dependent stage."""
+        for output_queue in self.output_queues:
+            output_queue.put(item)
+
+    def record(self, result, elapsed):
+        """Record a finished task and report progress."""
+        with self.lock:
+            self.completed += 1
+            self.busy_time += elapsed
+            if self.collect:
+                self.results.append(result)
+            completed = self.completed
+        label = f"{result['zone']}/{result['profile']}" if "profile" in result else result["zone"]
+        print(f"[{self.name}] {label} done ({completed} items)", flush=True)
+
+
+class Pipeline:
+    """Connect stages by their dependencies and run them concurrently."""
+
+    def __init__(self, stages, queue_size=4, processes=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.queue_size = queue_size
+        self.processes = processes
+
+        for stage in stages:
+            if stage.depends_on is None:
+                continue
+            if stage.depends_on not in self.stages:
+                raise ValueError(f"Stage {stage.name} depends on unknown stage {stage.depends_on}")
+            stage.input_queue = queue.Queue(maxsize=queue_size)
+            self.stages[stage.depends_on].output_queues.append(stage.input_queue)
+
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        """Raise ValueError if the stage dependencies contain a cycle."""
+        for stage in self.stages.values():
+            seen = set()
+            current = stage
+            while current.depends_on is not None:
+                if current.name in seen:
+                    raise ValueError(f"Stage dependency cycle through {current.name}")
+                seen.add(current.name)
+                current = self.stages[current.depends_on]
+
+    def _run_source(self, stage, pool):
+        """Run a source stage's generator and emit everything it yields."""
+        start = time.perf_counter()
+        try:
+            for item in stage.func(pool):
+                stage.record(item, time.perf_counter() - start)
+                stage.emit(item)
+                start = time.perf_counter()
+        except Exception as e:
+            print(f"[{stage.name}] Error: {e}", flush=True)
+            stage.errors.append(str(e))
+
+    def _run_worker(self, stage, pool):
+        """Consume items from the stage's input queue until upstream finishes."""
+        while True:
+            item = stage.input_queue.get()
+            if item is _DONE:
+                # Let sibling worker threads see the marker too
+                stage.input_queue.put(_DONE)
+                return
+
+            try:
+                self._process(stage, pool, item)
+            except Exception as e:
+                # Keep draining the queue, or upstream would block on it forever
+                print(f"[{stage.name}] Error processing {item.get('zone', '?')}: {e}", flush=True)
+                stage.errors.append(f"{item.get('zone', '?')}: {e}")
+
+    def _process(self, stage, pool, item):
+        """Run every task of one input item and pass the results downstream."""
+        tasks = stage.fan_out(item) if stage.fan_out else [item]
+
+        if not stage.use_processes:
+            for task in tasks:
+                self._finish(stage, task, time.perf_counter(), lambda task=task: stage.func(task))
+            return
+
+        started = {}
+        try:
+            for task in tasks:
+                started[pool.submit(stage.func, task)] = (task, time.perf_counter())
+        finally:
+            # Emit results in completion order so fast profiles move on first;
+            # tasks submitted before a failed submit still finish
+            pending = set(started)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task, task_start = started[future]
+                    self._finish(stage, task, task_start, future.result)
+
+    def _finish(self, stage, task, task_start, get_result):
+        """Collect a task result, record it and pass it downstream."""
+        try:
+            result = get_result()
+        except Exception as e:
+            label = f"{task['zone']}/{task.get('profile', '')}".rstrip('/')
+            print(f"[{stage.name}] Error processing {label}: {e}", flush=True)
+            stage.errors.append(f"{label}: {e}")
+            return
+
+        stage.record(result, time.perf_counter() - task_start)
+        stage.emit(result)
+
+    def _run_stage(self, stage, pool):
+        """Run all worker threads of a stage, then signal dependents."""
+        if stage.depends_on is None:
+            threads = [threading.Thread(target=self._run_source, args=(stage, pool))]
+        else:
+            threads = [threading.Thread(target=self._run_worker, args=(stage, pool))
+                       for _ in range(stage.workers)]
+
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            # Dependents wait for the marker, so send it even if this stage failed
+            stage.emit(_DONE)
+
+    def run(self):
+        """Run every stage to completion and return the stages."""
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            threads = [threading.Thread(target=self._run_stage, args=(stage, pool))
+                       for stage in self.stages.values()]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        return list(self.stages.values())
+
+
+def kml_zone_source(kml_file_path, with_colors=False, processes=None):
+    """Return a source that converts the KML file and yields zones in document order.
+
+    The Placemarks are split into a few chunks per worker process of the pool.
+    """
+
+    def source(pool):
+        with open(kml_file_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                root_tag = find_root_start_tag(buffer)
+                index = build_placemark_index(buffer)
+                styles = build_style_cache(buffer, index, root_tag) if with_colors else None
+
+        chunks = split_index(index, (processes or os.cpu_count() or 1) * 4)
+        futures = [pool.submit(parse_placemark_range, kml_file_path, root_tag, chunk, with_colors, styles)
+                   for chunk in chunks]
+
+        zones_seen = set()
+        for future in futures:
+            for _, zone_name, feature, _ in future.result():
+                # The first Placemark of each zone wins, as in the sequential converters
+                if zone_name in zones_seen:
+                    continue
+                zones_seen.add(zone_name)
+
+                if feature is None:
+                    print(f"Warning: No geometry found for zone {zone_name}")
+                    continue
+
+                yield {"zone": zone_name, "geojson": {"type": "FeatureCollection", "features": [feature]}}
+
+    return source
+
+
+def geojson_zone_source(input_dir):
+    """Return a source that yields already converted zones from a GeoJSON directory."""
+
+    def source(pool):
+        # Smallest files first so they reach the end of the pipeline quickly
+        for input_file in sorted(Path(input_dir).glob("*.geojson"), key=lambda p: p.stat().st_size):
+            with open(input_file, 'r') as f:
+                geojson = json.load(f)
+            yield {"zone": input_file.stem.replace("zone_", "", 1), "geojson": geojson}
+
+    return source
+
+
+def profile_tasks(profiles, algorithm):
+    """Return a fan-out that turns a converted zone into one task per profile."""
+
+    def fan_out(item):
+        return [dict(item, profile=profile, algorithm=algorithm) for profile in profiles]
+
+    return fan_out
+
+
+def without_colors(geojson):
+    """Copy of a zone with the KML style properties removed from every feature."""
+    features = []
+    for feature in geojson["features"]:
+        properties = feature.get("properties") or {}
+        if any(key in properties for key in COLOR_PROPERTIES):
+            properties = {key: value for key, value in properties.items() if key not in COLOR_PROPERTIES}
+            feature = dict(feature, properties=properties)
+        features.append(feature)
+    return dict(geojson, features=features)
+
+
+def label_tasks(item):
+    """Label every simplified profile except the colored copy of the original."""
+    return [] if item["profile"] == COLORS_PROFILE else [item]
+
+
+def dissolve_zone(task):
+    """Dissolve edge-adjacent polygons of a converted zone."""
+    return {"zone": task["zone"], "geojson": dissolve_geojson(task["geojson"])}
+
+
+def simplify_zone(task):
+    """Simplify a zone's features for one profile."""
+    geojson = task["geojson"]
+    if task["profile"] == COLORS_PROFILE:
+        return {"zone": task["zone"], "profile": task["profile"], "geojson": geojson}
+
+    geojson = without_colors(geojson)
+    if PROFILES[task["profile"]] is not None:
+        simplify, settings = PROFILES[task["profile"]]
+        if simplify is not simplify_geometry:
+            settings = dict(settings, algorithm=task["algorithm"])
+
+        features = []
+        for feature in geojson["features"]:
+            feature = dict(feature)
+            if feature.get("geometry"):
+                feature["geometry"] = simplify(feature["geometry"], **settings)
+            features.append(feature)
+        geojson = dict(geojson, features=features)
+
+    return {"zone": task["zone"], "profile": task["profile"], "geojson": geojson}
+
+
+def label_zone(task, min_area_km2=100.0, precision=500.0):
+    """Compute label points for a simplified zone profile."""
+    labels = zone_labels(task["geojson"], task["zone"], min_area_km2, precision)
+    return {"zone": task["zone"], "profile": task["profile"], "labels": labels}
+
+
+def write_zone_labels(label_stage, output_roots, compress=True):
+    """Write the label sidecar of every profile collected by the label stage."""
+    by_profile = {}
+    for result in label_stage.results:
+        by_profile.setdefault(result["profile"], []).extend(result["labels"])
+
+    for root in output_roots:
+        for profile, labels in sorted(by_profile.items()):
+            output_path = write_labels(root, profile, labels)
+            if compress:
+                compress_file(str(output_path))
+            print(f"{len(labels):,} label points written to {output_path}")
+
+
+def encode_zone(task, output_roots):
+    """Write a zone profile to every output root and return the written paths."""
+    if task["profile"] in ("original", COLORS_PROFILE):
+        # Original files keep the converter's indented layout
+        content = json.dumps(task["geojson"], indent=2)
+    else:
+        content = json.dumps(task["geojson"], separators=(',', ':'))
+
+    filename = f"zone_{task['zone'].replace('/', '_')}.geojson"
+    paths = []
+    for root in output_roots:
+        output_dir = Path(root) / task["profile"]
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_path = output_dir / filename
+
+        # Write then rename so readers never see a partially written file
+        temp_path = output_path.with_name(output_path.name + ".tmp")
+        with open(temp_path, 'w') as f:
+            f.write(content)
+        os.replace(temp_path, output_path)
+        paths.append(str(output_path))
+
+    return {"zone": task["zone"], "profile": task["profile"], "paths": paths, "bytes": len(content)}
+
+
+def compress_zone(task):
+    """Write .gz and .br siblings for every published copy of a zone profile."""
+    for path in task["paths"]:
+        compress_file(path)
+    return task
+
+
+def validate_geojson(geojson):
+    """Return a list of problems found in a zone GeoJSON document."""
+    problems = []
+
+    if geojson.get("type") != "FeatureCollection":
+        problems.append("not a FeatureCollection")
+    if not geojson.get("features"):
+        problems.append("no features")
+        return problems
+
+    for feature in geojson["features"]:
+        geometry = feature.get("geometry")
+        if not geometry or geometry.get("type") not in ("Polygon", "MultiPolygon"):
+            problems.append("geometry is not a Polygon or MultiPolygon")
+            continue
+
+        polygons = [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+        if not polygons:
+            problems.append("empty geometry")
+        for polygon in polygons:
+            for ring in polygon:
+                if len(ring) < 4:
+                    problems.append(f"ring with {len(ring)} points")
+                elif ring[0] != ring[-1]:
+                    problems.append("unclosed ring")
+
+    return problems
+
+
+def validate_zone(task):
+    """Re-read a published zone file and validate it."""
+    with open(task["paths"][0], 'r') as f:
+        geojson = json.load(f)
+
+    problems = validate_geojson(geojson)
+    if problems:
+        raise ValueError(f"{len(problems)} problems, first: {problems[0]}")
+
+    return {"zone": task["zone"], "profile": task["profile"], "bytes": task["bytes"]}
+
+
+def build_pipeline(source, output_roots, profiles, algorithm="douglas_peucker", queue_size=4, processes=None,
+                   dissolve=False, compress=True, labels=False, with_colors=False):
+    """Build the convert -> [dissolve ->] simplify -> encode -> [compress ->] validate pipeline.
+
+    With labels, a label stage also consumes the simplified zones and collects
+    their label points. With with_colors, the source's colored zones are also
+    published unchanged under the with_colors profile.
+    """
+    workers = processes or os.cpu_count() or 1
+    if with_colors:
+        profiles = list(profiles) + [COLORS_PROFILE]
+    stages = [Stage("convert", source)]
+    if dissolve:
+        stages.append(Stage("dissolve", dissolve_zone, depends_on="convert", workers=workers, use_processes=True))
+    stages += [
+        Stage("simplify", simplify_zone, depends_on="dissolve" if dissolve else "convert",
+              fan_out=profile_tasks(profiles, algorithm), workers=workers, use_processes=True),
+        Stage("encode", partial(encode_zone, output_roots=output_roots), depends_on="simplify",
+              workers=workers, use_processes=True),
+    ]
+    if labels:
+        stages.append(Stage("label", label_zone, depends_on="simplify", fan_out=label_tasks, workers=workers,
+                            use_processes=True, collect=True))
+    if compress:
+        stages.append(Stage("compress", compress_zone, depends_on="encode", workers=workers, use_processes=True))
+    stages.append(Stage("validate", validate_zone, depends_on="compress" if compress else "encode",
+                        workers=workers, use_processes=True))
+    return Pipeline(stages, queue_size=queue_size, processes=processes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run convert -> simplify -> encode -> validate as one pipeline.")
+    parser.add_argument("--kml-file", default="../data/source/phzm_us_zones_kml_2023.kml")
+    parser.add_argument("--input-dir", default=None,
+                        help="Start from an existing original GeoJSON directory instead of the KML file")
+    parser.add_argument("--output-root", action="append", default=None,
+                        help="Output root, may be given more than once (default: ../data/geojson and ../public/geojson)")
+    parser.add_argument("--profiles", default=",".join(PROFILES),
+                        help=f"Comma-separated profiles (default: {','.join(PROFILES)})")
+    parser.add_argument("--algorithm", choices=sorted(SIMPLIFIERS), default="douglas_peucker")
+    parser.add_argument("--dissolve", action="store_true",
+                        help="Merge edge-adjacent polygons of each zone before simplification")
+    parser.add_argument("--no-compress", action="store_true",
+                        help="Skip writing .gz/.br siblings and the asset manifest")
+    parser.add_argument("--labels", action="store_true",
+                        help="Also write pole-of-inaccessibility label points to <root>/labels/<profile>.geojson")
+    parser.add_argument("--with-colors", action="store_true",
+                        help="Also write zones with KML style colors to <root>/with_colors (KML input only)")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--queue-size", type=int, default=4, help="Bound on items waiting between stages")
+    args = parser.parse_args()
+
+    output_roots = args.output_root or ["../data/geojson", "../public/geojson"]
+    profiles = [profile.strip() for profile in args.profiles.split(",") if profile.strip()]
+    unknown = [profile for profile in profiles if profile not in PROFILES]
+    if unknown:
+        print(f"Error: unknown profiles {unknown}, choose from {list(PROFILES)}")
+        sys.exit(1)
+
+    if args.input_dir:
+        source = geojson_zone_source(args.input_dir)
+        print(f"Running pipeline from {args.input_dir}...")
+    else:
+        if not os.path.exists(args.kml_file):
+            print(f"Error: KML file not found at {args.kml_file}")
+            sys.exit(1)
+        source = kml_zone_source(args.kml_file, args.with_colors, args.processes)
+        print(f"Running pipeline from {args.kml_file}...")
+
+    print(f"Profiles: {', '.join(profiles)} -> {', '.join(output_roots)}\n")
+
+    start = time.perf_counter()
+    pipeline = build_pipeline(source, output_roots, profiles, args.algorithm, args.queue_size, args.processes,
+                              args.dissolve, not args.no_compress, args.labels,
+                              args.with_colors and not args.input_dir)
+    stages = pipeline.run()
+
+    if args.labels:
+        write_zone_labels(pipeline.stages["label"], output_roots, not args.no_compress)
+
+    if not args.no_compress:
+        for root in output_roots:
+            write_manifest(root, build_manifest(root))
+            print(f"Asset manifest written to {Path(root) / 'manifest.json'}")
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{'Stage':<10}{'Items':>8}{'Errors':>8}{'Busy (s)':>10}")
+    for stage in stages:
+        print(f"{stage.name:<10}{stage.completed:>8}{len(stage.errors):>8}{stage.busy_time:>10.2f}")
+    print(f"\nPipeline finished in {elapsed:.2f}s")
+
+    if any(stage.errors for stage in stages):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
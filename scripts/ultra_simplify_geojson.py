@@ -3,11 +3,14 @@
 Ultra-aggressive GeoJSON simplification to get files under 100KB each.
 """
 
+import argparse
 import json
 import os
 from pathlib import Path
 import math
 
+from visvalingam_whyatt import visvalingam_whyatt
+
 
 def douglas_peucker(points, tolerance):
     """Douglas-Peucker line simplification algorithm."""
@@ -61,13 +64,24 @@ def point_to_line_distance(point, line_start, line_end):
     return numerator / denominator
 
 
-def ultra_simplify_coordinates(coordinates, tolerance=0.01):
+# Line simplification engines selectable by name
+SIMPLIFIERS = {
+    "douglas_peucker": douglas_peucker,
+    "visvalingam_whyatt": visvalingam_whyatt,
+}
+
+
+def ultra_simplify_coordinates(coordinates, tolerance=0.01, algorithm="douglas_peucker"):
     """Ultra-aggressive coordinate simplification."""
     if len(coordinates) <= 3:
         return coordinates
     
-    # Apply Douglas-Peucker algorithm
-    simplified = douglas_peucker(coordinates, tolerance)
+    if algorithm == "visvalingam_whyatt":
+        # Stop at 4 points so the ring stays a valid polygon
+        simplified = visvalingam_whyatt(coordinates, tolerance, 4)
+    else:
+        # Apply the selected engine (Douglas-Peucker by default)
+        simplified = SIMPLIFIERS[algorithm](coordinates, tolerance)
     
     # Ensure we have at least 4 points for a valid polygon (including closure)
     if len(simplified) < 4:
@@ -93,12 +107,12 @@ def round_coordinates(coordinates, precision=3):
         return [round(coord, precision) for coord in coordinates]
 
 
-def ultra_simplify_geometry(geometry, tolerance=0.01, coordinate_precision=3):
+def ultra_simplify_geometry(geometry, tolerance=0.01, coordinate_precision=3, algorithm="douglas_peucker"):
     """Ultra-aggressively simplify a GeoJSON geometry."""
     if geometry["type"] == "Polygon":
         simplified_coords = []
         for ring in geometry["coordinates"]:
-            simplified_ring = ultra_simplify_coordinates(ring, tolerance)
+            simplified_ring = ultra_simplify_coordinates(ring, tolerance, algorithm)
             simplified_ring = round_coordinates(simplified_ring, coordinate_precision)
             # Only keep rings with at least 4 points
             if len(simplified_ring) >= 4:
@@ -138,7 +152,7 @@ def ultra_simplify_geometry(geometry, tolerance=0.01, coordinate_precision=3):
         for _, _, polygon in polygon_sizes[:max_polygons]:
             simplified_polygon = []
             for ring in polygon:
-                simplified_ring = ultra_simplify_coordinates(ring, tolerance)
+                simplified_ring = ultra_simplify_coordinates(ring, tolerance, algorithm)
                 simplified_ring = round_coordinates(simplified_ring, coordinate_precision)
                 if len(simplified_ring) >= 4:
                     simplified_polygon.append(simplified_ring)
@@ -167,7 +181,8 @@ def ultra_simplify_geometry(geometry, tolerance=0.01, coordinate_precision=3):
     return geometry
 
 
-def ultra_simplify_geojson_file(input_path, output_path, tolerance=0.01, coordinate_precision=3):
+def ultra_simplify_geojson_file(input_path, output_path, tolerance=0.01, coordinate_precision=3,
+                                algorithm="douglas_peucker"):
     """Ultra-aggressively simplify a GeoJSON file."""
     try:
         with open(input_path, 'r') as f:
@@ -181,7 +196,8 @@ def ultra_simplify_geojson_file(input_path, output_path, tolerance=0.01, coordin
                 feature["geometry"] = ultra_simplify_geometry(
                     feature["geometry"], 
                     tolerance, 
-                    coordinate_precision
+                    coordinate_precision,
+                    algorithm
                 )
         
         # Write ultra-simplified version with minimal whitespace
@@ -201,6 +217,11 @@ def ultra_simplify_geojson_file(input_path, output_path, tolerance=0.01, coordin
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Ultra-aggressive GeoJSON simplification.")
+    parser.add_argument("--algorithm", choices=sorted(SIMPLIFIERS), default="douglas_peucker",
+                        help="Line simplification engine (default: douglas_peucker)")
+    args = parser.parse_args()
+    
     input_dir = "../data/geojson/original"
     output_dir = "../data/geojson/ultra"
     
@@ -226,7 +247,8 @@ def main():
             str(input_file), 
             str(output_file),
             tolerance=0.02,  # Very aggressive - ~2km tolerance
-            coordinate_precision=3  # 3 decimal places (~111m precision)
+            coordinate_precision=3,  # 3 decimal places (~111m precision)
+            algorithm=args.algorithm
         )
         
         if success:
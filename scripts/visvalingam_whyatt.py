@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Visvalingam-Whyatt line simplification.
+
+Points are removed in order of the area of the triangle they form with their
+neighbors. A priority queue keeps the smallest triangle on top and neighbor
+areas are updated as points are removed, so a ring of n points is simplified
+in O(n log n). Unlike Douglas-Peucker it can stop at a minimum point count,
+so small rings keep their shape instead of collapsing.
+"""
+
+import heapq
+
+
+def triangle_area(a, b, c):
+    """Area of the triangle formed by three [lon, lat] points."""
+    return abs((b[0] - a[0]) * (c[1] - a[1]) - (c[0] - a[0]) * (b[1] - a[1])) / 2
+
+
+def visvalingam_whyatt(points, tolerance, min_points=2):
+    """Visvalingam-Whyatt line simplification algorithm.
+
+    The tolerance is a distance, like the Douglas-Peucker tolerance; points whose
+    effective area is below tolerance ** 2 are removed. The first and last points
+    are always kept and at least min_points points are returned.
+    """
+    n = len(points)
+    if n <= 2 or n <= min_points:
+        return points
+
+    area_threshold = tolerance * tolerance
+
+    prev_index = list(range(-1, n - 1))
+    next_index = list(range(1, n + 1))
+    areas = [float('inf')] * n
+
+    heap = []
+    for i in range(1, n - 1):
+        areas[i] = triangle_area(points[i - 1], points[i], points[i + 1])
+        heap.append((areas[i], i))
+    heapq.heapify(heap)
+
+    remaining = n
+    removed_area = 0.0
+
+    while heap and remaining > min_points:
+        area, i = heapq.heappop(heap)
+
+        # Skip stale entries left behind by neighbor updates
+        if area != areas[i]:
+            continue
+
+        if area >= area_threshold:
+            break
+
+        # Effective areas never decrease, so a point is not removed before the
+        # point that made it visible
+        removed_area = max(removed_area, area)
+
+        prev_i = prev_index[i]
+        next_i = next_index[i]
+        next_index[prev_i] = next_i
+        prev_index[next_i] = prev_i
+        areas[i] = None
+        remaining -= 1
+
+        for j in (prev_i, next_i):
+            if j == 0 or j == n - 1:
+                continue
+            new_area = max(removed_area, triangle_area(points[prev_index[j]], points[j], points[next_index[j]]))
+            areas[j] = new_area
+            heapq.heappush(heap, (new_area, j))
+
+    return [point for point, area in zip(points, areas) if area is not None]
@@ -0,0 +1,131 @@
+"""
+Zone geometry shared by the analysis, lookup and export scripts.
+
+Zone files are loaded as lists of (n, 2) ring arrays. Rings are rasterized
+onto a regular lon/lat Grid with a vectorized even-odd scanline fill, and
+coverage_bits stacks every zone of a variant into one bitmask per cell.
+"""
+
+import json
+import math
+
+import numpy as np
+
+
+KM_PER_DEGREE = 111.32
+
+# Grid origin offset in cells for x and y (2 - golden ratio, sqrt(2) - 1)
+GRID_SHIFT = (0.3819660112501051, 0.41421356237309515)
+
+# Zone order used by the frontend lookup
+ZONE_ORDER = ['3a', '3b', '4a', '4b', '5a', '5b', '6a', '6b', '7a', '7b', '8a', '8b',
+              '9a', '9b', '10a', '10b', '11a', '11b', '12a']
+
+
+class Grid:
+    """A regular lon/lat grid with cell centers at x0 + (col + 0.5) * cell_size.
+
+    The origin is shifted off the coordinates' decimal lattice so no cell center
+    lies exactly on an edge, where a center would be counted as a gap. The axes
+    get unrelated irrational shifts, or centers would still land on diagonals
+    through lattice points.
+    """
+
+    def __init__(self, bbox, cell_size):
+        min_x, min_y, max_x, max_y = bbox
+        self.x0 = min_x - cell_size * GRID_SHIFT[0]
+        self.y0 = min_y - cell_size * GRID_SHIFT[1]
+        self.cell_size = cell_size
+        self.cols = int(math.ceil((max_x - self.x0) / cell_size)) + 1
+        self.rows = int(math.ceil((max_y - self.y0) / cell_size)) + 1
+
+        # Cell areas shrink with latitude
+        latitudes = self.y0 + (np.arange(self.rows) + 0.5) * cell_size
+        self.row_area_km2 = (cell_size * KM_PER_DEGREE) ** 2 * np.cos(np.radians(latitudes))
+
+    def cell_center(self, row, col):
+        """Lon/lat of a cell center."""
+        return self.x0 + (col + 0.5) * self.cell_size, self.y0 + (row + 0.5) * self.cell_size
+
+
+def load_rings(path):
+    """Load every ring of a zone file as an (n, 2) array."""
+    with open(path, 'r') as f:
+        geojson = json.load(f)
+
+    rings = []
+    for feature in geojson["features"]:
+        geometry = feature.get("geometry")
+        if not geometry:
+            continue
+        polygons = [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+        for polygon in polygons:
+            for ring in polygon:
+                if len(ring) >= 4:
+                    rings.append(np.asarray(ring, dtype=np.float64)[:, :2])
+    return rings
+
+
+def rings_bbox(rings):
+    """Bounding box of a list of ring arrays."""
+    points = np.concatenate(rings)
+    return points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max()
+
+
+def ring_edges(rings):
+    """Edge end point arrays (x1, y1, x2, y2) of a list of ring arrays."""
+    if not rings:
+        empty = np.zeros(0, dtype=np.float64)
+        return empty, empty, empty, empty
+    starts = np.concatenate([ring[:-1] for ring in rings])
+    ends = np.concatenate([ring[1:] for ring in rings])
+    return starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1]
+
+
+def rasterize(rings, grid):
+    """Rasterize rings onto the grid with an even-odd scanline fill."""
+    return rasterize_edges(*ring_edges(rings), grid)
+
+
+def rasterize_edges(x1, y1, x2, y2, grid):
+    """Rasterize polygon edges onto the grid with an even-odd scanline fill.
+
+    Every edge crossing a row center toggles the parity from the first cell
+    center right of the crossing onwards; a cumulative sum along each row
+    turns the toggles into filled cells. Edges left of the grid still toggle
+    its first column, so the grid may be a window onto larger polygons.
+    """
+    # Rows whose center lies in [min_y, max_y) of each edge, clamped to the grid
+    lo = np.minimum(y1, y2)
+    hi = np.maximum(y1, y2)
+    first_row = np.clip(np.ceil((lo - grid.y0) / grid.cell_size - 0.5), 0, grid.rows).astype(np.int64)
+    end_row = np.clip(np.ceil((hi - grid.y0) / grid.cell_size - 0.5), 0, grid.rows).astype(np.int64)
+    counts = np.maximum(end_row - first_row, 0)
+
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros((grid.rows, grid.cols), dtype=bool)
+
+    # One entry per (edge, row) crossing
+    edge = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.cumsum(counts) - counts
+    rows = first_row[edge] + (np.arange(total) - offsets[edge])
+
+    row_y = grid.y0 + (rows + 0.5) * grid.cell_size
+    crossing_x = x1[edge] + (row_y - y1[edge]) * (x2[edge] - x1[edge]) / (y2[edge] - y1[edge])
+    cols = np.ceil((crossing_x - grid.x0) / grid.cell_size - 0.5).astype(np.int64)
+    cols = np.clip(cols, 0, grid.cols)
+
+    toggles = np.bincount(rows * (grid.cols + 1) + cols, minlength=grid.rows * (grid.cols + 1))
+    toggles = toggles.reshape(grid.rows, grid.cols + 1)
+
+    return (np.cumsum(toggles, axis=1)[:, :grid.cols] & 1).astype(bool)
+
+
+def coverage_bits(zone_rings, zones, grid):
+    """Rasterize every zone and return a per-cell bitmask of covering zones."""
+    bits = np.zeros((grid.rows, grid.cols), dtype=np.uint32)
+    for index, zone in enumerate(zones):
+        mask = rasterize(zone_rings[zone], grid)
+        bits |= mask.astype(np.uint32) << np.uint32(index)
+    return bits
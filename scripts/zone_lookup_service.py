@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+"""
+Asyncio HTTP service that resolves a ZIP code or lat/lon to a hardiness zone.
+
+Zone polygons are preloaded into a ZoneIndex: a grid storing, per cell, the
+zones covering the cell center and the edges passing through the cell. A
+lookup starts from the cell center's zones and flips membership for every
+edge crossed on the way to the point, so it only touches one cell's edges.
+
+ZIP codes are geocoded through a pluggable Geocoder. NominatimGeocoder keeps a
+pooled keep-alive connection (it needs the optional aiohttp package);
+FileGeocoder serves ZIP centroids from a local JSON or CSV file for offline
+use. Geocodes and zone results are kept in bounded LRU caches with a TTL,
+and concurrent requests for the same ZIP share one geocoder call.
+
+Endpoints:
+    GET /zone?zip=12345
+    GET /zone?lat=40.7&lon=-74.0
+    GET /stats
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from zone_geometry import ZONE_ORDER, Grid, coverage_bits, load_rings, ring_edges, rings_bbox
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+USER_AGENT = "Victory-Garden-Map/1.0"
+ZIP_PATTERN = re.compile(r"^\d{5}$")
+
+_MISSING = object()
+
+
+class ZoneIndex:
+    """In-memory point-to-zone resolution over one variant's zone files.
+
+    Overlapping zones resolve to the first zone in ZONE_ORDER, the order the
+    frontend checks them in. Holes are honored.
+    """
+
+    def __init__(self, zone_rings, cell_size=0.05):
+        self.zones = [zone for zone in ZONE_ORDER if zone_rings.get(zone)]
+        if not self.zones:
+            raise ValueError("No zone polygons to index")
+        if len(self.zones) > 32:
+            raise ValueError("At most 32 zones fit in a cell bitmask")
+
+        boxes = [rings_bbox(zone_rings[zone]) for zone in self.zones]
+        # Grid shifts its origin off the coordinates' decimal lattice, so no cell
+        # center lies exactly on an edge where the raster and the crossing test
+        # could round the same crossing to different sides
+        bbox = (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                max(b[2] for b in boxes), max(b[3] for b in boxes))
+        self.grid = Grid(bbox, cell_size)
+
+        # Zones covering each cell center
+        self.center_bits = coverage_bits(zone_rings, self.zones, self.grid)
+
+        # Edges of every zone bucketed by the cells their bounding boxes touch
+        zone_ids = []
+        edges = []
+        for index, zone in enumerate(self.zones):
+            x1, y1, x2, y2 = ring_edges(zone_rings[zone])
+            zone_ids.append(np.full(len(x1), index, dtype=np.uint8))
+            edges.append(np.column_stack([x1, y1, x2, y2]))
+        zone_ids = np.concatenate(zone_ids)
+        edges = np.concatenate(edges)
+
+        grid = self.grid
+        col1 = self._clamp_cells((np.minimum(edges[:, 0], edges[:, 2]) - grid.x0) / cell_size, grid.cols)
+        col2 = self._clamp_cells((np.maximum(edges[:, 0], edges[:, 2]) - grid.x0) / cell_size, grid.cols)
+        row1 = self._clamp_cells((np.minimum(edges[:, 1], edges[:, 3]) - grid.y0) / cell_size, grid.rows)
+        row2 = self._clamp_cells((np.maximum(edges[:, 1], edges[:, 3]) - grid.y0) / cell_size, grid.rows)
+
+        # One entry per (edge, cell) pair
+        widths = col2 - col1 + 1
+        counts = widths * (row2 - row1 + 1)
+        edge = np.repeat(np.arange(len(counts)), counts)
+        step = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        cells = (row1[edge] + step // widths[edge]) * grid.cols + col1[edge] + step % widths[edge]
+
+        order = np.argsort(cells, kind="stable")
+        self.offsets = np.searchsorted(cells[order], np.arange(grid.rows * grid.cols + 1))
+        self.cell_zone = zone_ids[edge[order]]
+        self.cell_edges = edges[edge[order]]
+
+    @staticmethod
+    def _clamp_cells(values, limit):
+        return np.clip(np.floor(values), 0, limit - 1).astype(np.int64)
+
+    @classmethod
+    def from_directory(cls, variant_dir, cell_size=0.05):
+        """Build the index from the zone_*.geojson files of a variant directory."""
+        zone_rings = {}
+        for zone in ZONE_ORDER:
+            path = Path(variant_dir) / f"zone_{zone}.geojson"
+            if path.exists():
+                zone_rings[zone] = load_rings(path)
+        return cls(zone_rings, cell_size)
+
+    def zones_at(self, lat, lon):
+        """Bitmask of the zones containing a point."""
+        grid = self.grid
+        col = int((lon - grid.x0) // grid.cell_size)
+        row = int((lat - grid.y0) // grid.cell_size)
+        if not (0 <= col < grid.cols and 0 <= row < grid.rows):
+            return 0
+
+        bits = int(self.center_bits[row, col])
+        cell = row * grid.cols + col
+        start, end = self.offsets[cell], self.offsets[cell + 1]
+        if start == end:
+            # No boundary in this cell: the point shares the center's zones
+            return bits
+
+        cx, cy = grid.cell_center(row, col)
+        x1, y1, x2, y2 = self.cell_edges[start:end].T
+        zone_ids = self.cell_zone[start:end]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Edges crossed moving horizontally from the center to (lon, cy)
+            crossing_x = x1 + (cy - y1) * (x2 - x1) / (y2 - y1)
+            horizontal = ((y1 > cy) != (y2 > cy)) & (crossing_x > min(cx, lon)) & (crossing_x <= max(cx, lon))
+
+            # Then vertically from (lon, cy) to the point
+            crossing_y = y1 + (lon - x1) * (y2 - y1) / (x2 - x1)
+            vertical = ((x1 > lon) != (x2 > lon)) & (crossing_y > min(cy, lat)) & (crossing_y <= max(cy, lat))
+
+        flips = np.bincount(zone_ids[horizontal ^ vertical], minlength=len(self.zones)) & 1
+        for index in np.flatnonzero(flips):
+            bits ^= 1 << int(index)
+        return bits
+
+    def lookup(self, lat, lon):
+        """Zone containing a point, or None outside every zone."""
+        bits = self.zones_at(lat, lon)
+        if not bits:
+            return None
+        return self.zones[(bits & -bits).bit_length() - 1]
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after a time to live."""
+
+    def __init__(self, maxsize=100000, ttl=86400.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Return a live entry and mark it recently used."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires = entry
+            if expires > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value, ttl=None):
+        """Store an entry, evicting the least recently used one when full."""
+        self._entries[key] = (value, self.clock() + (self.ttl if ttl is None else ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+class GeocoderError(Exception):
+    """The geocoding backend failed or is unreachable."""
+
+
+class Geocoder:
+    """Geocoder interface: resolve a ZIP code to {"lat", "lon", "display_name"} or None."""
+
+    async def geocode(self, zip_code):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class NominatimGeocoder(Geocoder):
+    """Nominatim search over a pooled keep-alive HTTP connection.
+
+    Requests are spaced by min_interval seconds to respect the public
+    instance's usage policy; lower it for a self-hosted instance.
+    """
+
+    def __init__(self, url=NOMINATIM_URL, connections=4, timeout=10.0, min_interval=1.0):
+        if aiohttp is None:
+            raise RuntimeError("NominatimGeocoder needs the aiohttp package (pip install aiohttp)")
+        self.url = url
+        self.connections = connections
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self._session = None
+        self._throttle = asyncio.Lock()
+        self._last_request = 0.0
+
+    def _get_session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.connections, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"User-Agent": USER_AGENT},
+            )
+        return self._session
+
+    async def _wait_turn(self):
+        async with self._throttle:
+            delay = self._last_request + self.min_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._last_request = time.monotonic()
+
+    async def geocode(self, zip_code):
+        await self._wait_turn()
+        params = {"format": "json", "countrycodes": "us", "postalcode": zip_code, "limit": "1"}
+        try:
+            async with self._get_session().get(self.url, params=params) as response:
+                if response.status != 200:
+                    raise GeocoderError(f"Nominatim returned {response.status}")
+                data = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise GeocoderError(str(e)) from e
+
+        if not data:
+            return None
+        return {"lat": float(data[0]["lat"]), "lon": float(data[0]["lon"]),
+                "display_name": data[0].get("display_name", "")}
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class FileGeocoder(Geocoder):
+    """Offline geocoder backed by a local ZIP centroid file.
+
+    Accepts a JSON object mapping ZIP codes to {"lat", "lon", "display_name"}
+    or a CSV file with zip, lat, lon and optional display_name columns. An
+    optional delay simulates a remote backend.
+    """
+
+    def __init__(self, path, delay=0.0):
+        self.delay = delay
+        self.locations = {}
+
+        path = Path(path)
+        with open(path, 'r', newline='') as f:
+            if path.suffix.lower() == ".csv":
+                rows = ((row["zip"], row) for row in csv.DictReader(f))
+            else:
+                rows = json.load(f).items()
+            for zip_code, row in rows:
+                self.locations[zip_code.zfill(5)] = {
+                    "lat": float(row["lat"]),
+                    "lon": float(row["lon"]),
+                    "display_name": row.get("display_name") or "",
+                }
+
+    async def geocode(self, zip_code):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        location = self.locations.get(zip_code)
+        return dict(location) if location else None
+
+
+class ZoneLookupService:
+    """ZIP and point lookups with caching and coalescing of in-flight ZIP geocodes."""
+
+    def __init__(self, index, geocoder, cache_size=100000, ttl=86400.0, negative_ttl=300.0, point_precision=5):
+        self.index = index
+        self.geocoder = geocoder
+        self.negative_ttl = negative_ttl
+        self.point_precision = point_precision
+        self.zip_cache = TTLCache(cache_size, ttl)
+        self.point_cache = TTLCache(cache_size, ttl)
+        self.geocoder_calls = 0
+        self.coalesced = 0
+        self._inflight = {}
+
+    def lookup_point(self, lat, lon):
+        """Zone for a point; points are cached rounded to about a meter."""
+        key = (round(lat, self.point_precision), round(lon, self.point_precision))
+        zone = self.point_cache.get(key, _MISSING)
+        if zone is _MISSING:
+            zone = self.index.lookup(lat, lon)
+            self.point_cache.set(key, zone)
+        return zone
+
+    async def lookup_zip(self, zip_code):
+        """Geocode a ZIP and resolve its zone, or return None for an unknown ZIP."""
+        result = self.zip_cache.get(zip_code, _MISSING)
+        if result is not _MISSING:
+            return result
+
+        future = self._inflight.get(zip_code)
+        if future is None:
+            future = asyncio.ensure_future(self._resolve_zip(zip_code))
+            self._inflight[zip_code] = future
+            future.add_done_callback(lambda _: self._inflight.pop(zip_code, None))
+        else:
+            self.coalesced += 1
+
+        # Shield so one cancelled client does not cancel the shared geocode
+        return await asyncio.shield(future)
+
+    async def _resolve_zip(self, zip_code):
+        self.geocoder_calls += 1
+        location = await self.geocoder.geocode(zip_code)
+        if location is None:
+            # Cache misses briefly so a bad ZIP does not hammer the geocoder
+            self.zip_cache.set(zip_code, None, self.negative_ttl)
+            return None
+
+        result = dict(location, zip=zip_code, zone=self.lookup_point(location["lat"], location["lon"]))
+        self.zip_cache.set(zip_code, result)
+        return result
+
+    def stats(self):
+        return {
+            "zip_cache": {"size": len(self.zip_cache), "hits": self.zip_cache.hits, "misses": self.zip_cache.misses},
+            "point_cache": {"size": len(self.point_cache), "hits": self.point_cache.hits,
+                            "misses": self.point_cache.misses},
+            "geocoder_calls": self.geocoder_calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+    async def handle_query(self, path):
+        """Answer a request path with (status, JSON body)."""
+        try:
+            return await self._answer(path)
+        except Exception as e:
+            # Any bug in a lookup becomes a 500 instead of a dropped connection
+            print(f"Error answering {path}: {e!r}", flush=True)
+            return 500, {"error": "Internal server error"}
+
+    async def _answer(self, path):
+        url = urlsplit(path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/stats":
+            return 200, self.stats()
+        if url.path != "/zone":
+            return 404, {"error": "Not found"}
+
+        if "zip" in params:
+            zip_code = params["zip"]
+            if not ZIP_PATTERN.match(zip_code):
+                return 400, {"error": "Invalid ZIP code format"}
+            try:
+                result = await self.lookup_zip(zip_code)
+            except GeocoderError:
+                return 502, {"error": "Geocoding service unavailable"}
+            if result is None:
+                return 404, {"error": "ZIP code not found"}
+            return 200, result
+
+        try:
+            lat = float(params["lat"])
+            lon = float(params["lon"])
+        except (KeyError, ValueError):
+            return 400, {"error": "Expected zip or lat and lon parameters"}
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return 400, {"error": "Coordinates out of range"}
+        return 200, {"lat": lat, "lon": lon, "zone": self.lookup_point(lat, lon)}
+
+    async def handle_connection(self, reader, writer):
+        """Serve GET requests on one keep-alive connection."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split()
+                headers = dict(line.split(":", 1) for line in lines[1:] if ":" in line)
+                headers = {key.strip().lower(): value.strip().lower() for key, value in headers.items()}
+
+                if len(parts) != 3 or parts[0] != "GET":
+                    status, body = 405, {"error": "Only GET is supported"}
+                    keep_alive = False
+                else:
+                    status, body = await self.handle_query(parts[1])
+                    keep_alive = (headers.get("connection") != "close" if parts[2] == "HTTP/1.1"
+                                  else headers.get("connection") == "keep-alive")
+
+                payload = json.dumps(body).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        except Exception as e:
+            print(f"Error on connection: {e!r}", flush=True)
+        finally:
+            writer.close()
+
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                500: "Internal Server Error", 502: "Bad Gateway"}
+
+
+async def serve(service, host, port):
+    """Run the HTTP server until cancelled."""
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Serving zone lookups on http://{host}:{port}/zone")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.geocoder.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve ZIP and lat/lon hardiness zone lookups.")
+    parser.add_argument("--variant-dir", default="../public/geojson/balanced",
+                        help="Zone files to resolve against (default: the variant the map shows)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--zip-file", help="JSON or CSV of ZIP centroids; use instead of Nominatim (offline)")
+    parser.add_argument("--geocoder-url", default=NOMINATIM_URL)
+    parser.add_argument("--geocoder-interval", type=float, default=1.0,
+                        help="Minimum seconds between Nominatim requests (default: 1.0)")
+    parser.add_argument("--cache-size", type=int, default=100000)
+    parser.add_argument("--ttl", type=float, default=86400.0, help="Cache time to live in seconds")
+    parser.add_argument("--cell-size", type=float, default=0.05, help="Index cell size in degrees")
+    parser.add_argument("--cascade-root", default=None,
+                        help="Resolve points coarse-to-fine across ultra, balanced and original under this "
+                             "root instead of one variant directory")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.cascade_root:
+        # Imported here: lookup_cascade builds on ZoneIndex from this module
+        from lookup_cascade import LookupCascade
+        index = LookupCascade.from_root(args.cascade_root, cell_size=args.cell_size)
+        source = f"{', '.join(index.names)} under {args.cascade_root}"
+    else:
+        index = ZoneIndex.from_directory(args.variant_dir, args.cell_size)
+        source = args.variant_dir
+    print(f"Indexed {len(index.zones)} zones from {source} in {time.perf_counter() - started:.1f}s")
+
+    if args.zip_file:
+        geocoder = FileGeocoder(args.zip_file)
+        print(f"Loaded {len(geocoder.locations):,} ZIP centroids from {args.zip_file}")
+    else:
+        geocoder = NominatimGeocoder(args.geocoder_url, min_interval=args.geocoder_interval)
+
+    service = ZoneLookupService(index, geocoder, args.cache_size, args.ttl)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()